@@ -3,29 +3,161 @@
 Claude ACE - Common utilities for hooks
 Shared functions for playbook management, reflection, and learning
 """
+import atexit
+import copy
+import functools
+import hashlib
+import itertools
 import json
 import os
+import re
 import sys
+import time
+from collections import deque
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Iterable, Iterator, Tuple, Set
 
-# Check for Claude Agent SDK availability
+# delta_manager lives next to this file and does not import common
+from delta_manager import PlaybookDelta, PlaybookHistory, apply_delta, get_name_index
+
+# Prefer orjson (C-backed) for JSON I/O, fall back to stdlib json
 try:
-    from claude_agent_sdk import (
-        ClaudeAgentOptions, ClaudeSDKClient, AssistantMessage, TextBlock
-    )
-    SDK_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    SDK_AVAILABLE = False
-    print("Warning: claude_agent_sdk not available. Reflection features disabled.",
-          file=sys.stderr)
+    ORJSON_AVAILABLE = False
+
+
 
+class KeywordScanner:
+    """
+    Find which of a fixed set of literal keywords occur in a text.
+    Uses a single Aho-Corasick pass when pyahocorasick is installed,
+    otherwise a precompiled regex alternation of the escaped keywords.
+    pyahocorasick is imported here rather than at module level, so hooks
+    that never scan keywords don't pay for it.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = tuple(keywords)
+        self._automaton = None
+        self._pattern = None
+        if not self.keywords:
+            return
+        try:
+            import ahocorasick
+        except ImportError:
+            # Zero-width lookahead reports a match at every position; longest
+            # keywords first, so the keywords it hides at the same position
+            # are exactly those contained in the reported one
+            ordered = sorted(set(self.keywords), key=len, reverse=True)
+            self._pattern = re.compile(
+                '(?=(' + '|'.join(map(re.escape, ordered)) + '))'
+            )
+            self._contained = {
+                keyword: [other for other in ordered if other in keyword]
+                for keyword in ordered
+            }
+        else:
+            automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def scan(self, text: str) -> Set[str]:
+        """Return the set of keywords found in text"""
+        if self._automaton is not None:
+            return {keyword for _, keyword in self._automaton.iter(text)}
+        found = set()
+        if self._pattern is not None:
+            for keyword in set(self._pattern.findall(text)):
+                found.update(self._contained[keyword])
+        return found
+
+    def contains_any(self, text: str) -> bool:
+        """True if any keyword occurs in text (stops at the first hit)"""
+        if self._automaton is not None:
+            for _ in self._automaton.iter(text):
+                return True
+            return False
+        return self._pattern is not None and self._pattern.search(text) is not None
+
+
+def json_loads(data):
+    """
+    Parse JSON from str or bytes.
+    Uses orjson when available, stdlib json otherwise.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize object to UTF-8 encoded JSON bytes (non-ASCII kept as-is).
+
+    Args:
+        obj: Object to serialize
+        indent: Pretty-print with 2-space indentation
 
+    Returns:
+        JSON document as bytes
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if indent else None,
+                      ensure_ascii=False).encode('utf-8')
+
+
+def iter_hook_input() -> Iterator[Tuple[str, Any]]:
+    """
+    Yield the top-level (key, value) pairs of the hook payload on stdin.
+    With ijson the payload is parsed incrementally, so a caller that stops
+    early (e.g. after session_id) doesn't parse the rest; otherwise the
+    whole payload is read and parsed at once.
+    """
+    try:
+        import ijson
+    except ImportError:
+        yield from json_loads(sys.stdin.buffer.read()).items()
+        return
+    yield from ijson.kvitems(sys.stdin.buffer, '', use_float=True)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_sdk() -> Optional[tuple]:
+    """
+    Import Claude Agent SDK on first use.
+    Hooks that never reflect don't pay the import cost.
+
+    Returns:
+        (ClaudeAgentOptions, ClaudeSDKClient, AssistantMessage, TextBlock),
+        or None if the SDK is not installed
+    """
+    try:
+        from claude_agent_sdk import (
+            ClaudeAgentOptions, ClaudeSDKClient, AssistantMessage, TextBlock
+        )
+    except ImportError:
+        print("Warning: claude_agent_sdk not available. Reflection features disabled.",
+              file=sys.stderr)
+        return None
+    return ClaudeAgentOptions, ClaudeSDKClient, AssistantMessage, TextBlock
+
+
+@functools.lru_cache(maxsize=1)
 def get_project_dir() -> Path:
     """
     Get the project root directory.
     Supports CLAUDE_PROJECT_DIR env variable for custom paths.
+    Cached for the process lifetime; call get_project_dir.cache_clear()
+    (and get_ace_dir.cache_clear()) after changing CLAUDE_PROJECT_DIR.
     """
     project_dir = os.getenv('CLAUDE_PROJECT_DIR')
     if project_dir:
@@ -34,21 +166,87 @@ def get_project_dir() -> Path:
     return Path(__file__).resolve().parent.parent.parent
 
 
+@functools.lru_cache(maxsize=1)
 def get_ace_dir() -> Path:
     """Get the .claude directory where ACE stores its data"""
     return get_project_dir() / ".claude"
 
 
+def get_tool_events_path(session_id: str) -> Path:
+    """
+    Get the per-session tool events log (.claude/tool_events/session_<id>.jsonl).
+    The session id is reduced to filename-safe characters.
+    """
+    safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in session_id)
+    return get_ace_dir() / "tool_events" / f"session_{safe_id or 'unknown'}.jsonl"
+
+
+def read_legacy_events(events_dir, session_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Read legacy one-file-per-event tool events (event_*.json) of a session.
+    The directory is walked once with os.scandir; unreadable files are skipped.
+
+    Returns:
+        (path, event) pairs in chronological (file name) order
+    """
+    matched = []
+    try:
+        with os.scandir(events_dir) as it:
+            for entry in it:
+                name = entry.name
+                if not (name.startswith("event_") and name.endswith(".json")):
+                    continue
+                try:
+                    with open(entry.path, 'rb') as f:
+                        event = json_loads(f.read())
+                except (OSError, ValueError):
+                    continue
+                if isinstance(event, dict) and event.get('session_id') == session_id:
+                    matched.append((name, entry.path, event))
+    except OSError:
+        return []
+
+    matched.sort(key=lambda item: item[0])
+    return [(path, event) for _, path, event in matched]
+
+
+@functools.lru_cache(maxsize=1)
+def get_playbook_path() -> str:
+    """Get path to playbook.json as a plain string (cached)"""
+    return os.path.join(get_ace_dir(), "playbook.json")
+
+
+@functools.lru_cache(maxsize=None)
+def _ensure_dir(path: str) -> None:
+    """Create a directory (and parents) once per process"""
+    os.makedirs(path, exist_ok=True)
+
+
 def load_config() -> Dict[str, Any]:
-    """Load ACE configuration with defaults"""
-    config_path = get_ace_dir() / "ace_config.json"
+    """
+    Load ACE configuration with defaults.
+    The parsed result is cached until ace_config.json is modified;
+    each caller gets its own copy, so it may be mutated freely.
+    """
+    config_path = os.path.join(get_ace_dir(), "ace_config.json")
+    try:
+        key = (config_path, os.stat(config_path).st_mtime_ns)
+    except OSError:
+        key = (None, 0)
+    return copy.deepcopy(_load_config_cached(*key))
+
+
+@functools.lru_cache(maxsize=4)
+def _load_config_cached(config_path: Optional[str], mtime_ns: int) -> Dict[str, Any]:
+    """Read and merge ace_config.json (cache key: path and mtime, (None, 0) if missing)"""
 
     # Default configuration
     default_config = {
         "reflection": {
             "min_atomicity_score": 0.70,
             "max_keypoints_to_inject": 15,
-            "auto_cleanup_threshold": -5
+            "auto_cleanup_threshold": -5,
+            "max_prompt_messages": 50
         },
         "scoring": {
             "helpful_delta": 1,
@@ -63,31 +261,38 @@ def load_config() -> Dict[str, Any]:
         }
     }
 
-    if not config_path.exists():
-        return default_config
-
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            user_config = json.load(f)
-            # Merge with defaults
-            return {**default_config, **user_config}
-    except Exception as e:
-        print(f"Warning: Failed to load config: {e}", file=sys.stderr)
-        return default_config
+    config = default_config
+    if config_path is not None:
+        try:
+            with open(config_path, 'rb') as f:
+                user_config = json_loads(f.read())
+                # Merge with defaults
+                config = {**default_config, **user_config}
+        except Exception as e:
+            print(f"Warning: Failed to load config: {e}", file=sys.stderr)
+
+    # Rating -> score delta table used by update_playbook_data
+    scoring = {**default_config["scoring"], **config.get("scoring", {})}
+    config["_rating_delta"] = {
+        "helpful": scoring["helpful_delta"],
+        "harmful": scoring["harmful_delta"],
+        "neutral": scoring["neutral_delta"]
+    }
+    return config
 
 
-def generate_keypoint_name(existing_names: set) -> str:
+def max_keypoint_number(names: Iterable[str]) -> int:
     """
-    Generate unique key point name in format: kpt_001, kpt_002, etc.
+    Find the highest number used by key point names in format kpt_###.
 
     Args:
-        existing_names: Set of already used keypoint names
+        names: Key point names to scan
 
     Returns:
-        New unique keypoint name
+        Highest number found, or 0 if none
     """
     max_num = 0
-    for name in existing_names:
+    for name in names:
         if name.startswith("kpt_"):
             try:
                 num = int(name.split("_")[1])
@@ -95,7 +300,22 @@ def generate_keypoint_name(existing_names: set) -> str:
             except (IndexError, ValueError):
                 continue
 
-    return f"kpt_{max_num + 1:03d}"
+    return max_num
+
+
+def generate_keypoint_name(max_num: int) -> Tuple[str, int]:
+    """
+    Generate the next key point name in format: kpt_001, kpt_002, etc.
+
+    Args:
+        max_num: Highest key point number already in use
+            (see max_keypoint_number)
+
+    Returns:
+        Tuple of (new unique keypoint name, updated highest number)
+    """
+    max_num += 1
+    return f"kpt_{max_num:03d}", max_num
 
 
 def load_playbook() -> Dict[str, Any]:
@@ -106,9 +326,17 @@ def load_playbook() -> Dict[str, Any]:
     Returns:
         Playbook dictionary with version, last_updated, and key_points
     """
-    playbook_path = get_ace_dir() / "playbook.json"
-
-    if not playbook_path.exists():
+    try:
+        with open(get_playbook_path(), 'rb') as f:
+            data = json_loads(f.read())
+    except FileNotFoundError:
+        return {
+            "version": "1.0",
+            "last_updated": None,
+            "key_points": []
+        }
+    except Exception as e:
+        print(f"Error loading playbook: {e}", file=sys.stderr)
         return {
             "version": "1.0",
             "last_updated": None,
@@ -116,8 +344,6 @@ def load_playbook() -> Dict[str, Any]:
         }
 
     try:
-        with open(playbook_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
 
         # Ensure required fields
         if "key_points" not in data:
@@ -127,34 +353,35 @@ def load_playbook() -> Dict[str, Any]:
 
         # Migrate old format: ensure all key points have name, score, and status
         keypoints = []
-        existing_names = set()
+        max_num = max_keypoint_number(
+            item["name"] for item in data["key_points"]
+            if isinstance(item, dict) and "name" in item
+        )
 
         for item in data["key_points"]:
             if isinstance(item, str):
                 # Old format: plain string
-                name = generate_keypoint_name(existing_names)
+                name, max_num = generate_keypoint_name(max_num)
                 keypoints.append({
                     "name": name,
                     "text": item,
                     "score": 0,
                     "status": "active"  # Default to active for old entries
                 })
-                existing_names.add(name)
             elif isinstance(item, dict):
-                # New format: ensure all fields
-                if "name" not in item:
-                    item["name"] = generate_keypoint_name(existing_names)
-                if "score" not in item:
-                    item["score"] = 0
-                if "status" not in item:
-                    # Default to active for backward compatibility
-                    item["status"] = "active"
+                # New format: ensure all fields (mutated in place)
                 if "text" not in item:
                     continue  # Skip invalid entries
-                existing_names.add(item["name"])
+                if "name" not in item:
+                    item["name"], max_num = generate_keypoint_name(max_num)
+                item.setdefault("score", 0)
+                # Default to active for backward compatibility
+                item.setdefault("status", "active")
                 keypoints.append(item)
 
         data["key_points"] = keypoints
+        # In-memory name lookup, maintained by apply_delta (not saved)
+        get_name_index(data)
         return data
 
     except Exception as e:
@@ -169,18 +396,170 @@ def load_playbook() -> Dict[str, Any]:
 def save_playbook(playbook: Dict[str, Any]):
     """
     Save playbook to disk with timestamp update.
+    In-memory helper fields (keys starting with "_") are not written.
+
+    The write (and timestamp update) is skipped when the content is
+    identical to what was last saved. A digest of the saved content is
+    kept in .playbook.sha next to the playbook, together with the file's
+    mtime so that external edits are detected.
 
     Args:
         playbook: Playbook dictionary to save
     """
-    playbook["last_updated"] = datetime.now().isoformat()
-    playbook_path = get_ace_dir() / "playbook.json"
+    playbook_path = get_playbook_path()
+    ace_dir = os.path.dirname(playbook_path)
+    digest_path = os.path.join(ace_dir, ".playbook.sha")
 
     # Ensure directory exists
-    playbook_path.parent.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(ace_dir)
+
+    public = _public_playbook(playbook)
+    public.pop("last_updated", None)
+    digest = hashlib.blake2b(json_dumps(public), digest_size=16).hexdigest()
+
+    try:
+        with open(digest_path, 'r') as f:
+            recorded = f.read().split()
+        if recorded == [str(os.stat(playbook_path).st_mtime_ns), digest]:
+            return
+    except OSError:
+        pass
+
+    playbook["last_updated"] = datetime.now().isoformat(timespec='seconds')
+    public = _public_playbook(playbook)
+    # Stored compact; use view_playbook.py --pretty for a readable dump
+    _atomic_write_bytes(playbook_path, json_dumps(public))
+
+    try:
+        with open(digest_path, 'w') as f:
+            f.write(f"{os.stat(playbook_path).st_mtime_ns} {digest}")
+    except OSError as e:
+        print(f"Warning: Failed to record playbook digest: {e}", file=sys.stderr)
+
+
+def _atomic_write_bytes(path: str, data: bytes):
+    """
+    Write bytes to a file atomically.
+    Data is written to a per-process temp file in the same directory,
+    fsynced, then renamed over the target, so readers never see a partially
+    written file and concurrent hooks never share a temp file.
+    """
+    tmp_path = f"{os.fspath(path)}.tmp.{os.getpid()}"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def append_line(path, data: bytes):
+    """
+    Append one serialized record (plus newline) to a log file.
+    The record goes out in a single write() on an O_APPEND descriptor, so
+    concurrent hook processes never interleave partial lines. The parent
+    directory is only created when the first open fails.
+    """
+    flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+    try:
+        fd = os.open(path, flags, 0o644)
+    except FileNotFoundError:
+        _ensure_dir(os.path.dirname(os.fspath(path)))
+        fd = os.open(path, flags, 0o644)
+    try:
+        os.write(fd, data + b'\n')
+    finally:
+        os.close(fd)
+
+
+def _public_playbook(playbook: Dict[str, Any]) -> Dict[str, Any]:
+    """Shallow copy of playbook without in-memory helper fields"""
+    public = {k: v for k, v in playbook.items() if not k.startswith("_")}
+    public["key_points"] = [
+        {k: v for k, v in kp.items() if not k.startswith("_")}
+        for kp in playbook.get("key_points", [])
+    ]
+    return public
 
-    with open(playbook_path, 'w', encoding='utf-8') as f:
-        json.dump(playbook, f, indent=2, ensure_ascii=False)
+
+def normalize_keypoint_text(text: str) -> str:
+    """
+    Normalize key point text for duplicate detection: runs of whitespace are
+    collapsed to single spaces and case is folded.
+    ASCII text takes the fast lower() path; other text is casefolded.
+    """
+    text = " ".join(text.split())
+    return text.lower() if text.isascii() else text.casefold()
+
+
+def char_ngram_minhash(text: str, num_perm: int):
+    """
+    MinHash of the character 3-grams of text (requires datasketch).
+    Texts shorter than 3 characters are hashed as a single shingle.
+    datasketch (and numpy with it) is imported on first use only.
+    """
+    from datasketch import MinHash
+
+    minhash = MinHash(num_perm=num_perm)
+    for i in range(max(len(text) - 2, 1)):
+        minhash.update(text[i:i + 3].encode("utf-8"))
+    return minhash
+
+
+def _keypoint_norm(kp: Dict[str, Any]) -> str:
+    """Get normalized text of a key point, cached on the key point as "_norm" """
+    norm = kp.get("_norm")
+    if norm is None:
+        norm = kp["_norm"] = normalize_keypoint_text(kp["text"])
+    return norm
+
+
+@functools.lru_cache(maxsize=1)
+def get_history():
+    """
+    Get the process-wide PlaybookHistory.
+    Its buffered entries are written out when the process exits.
+    """
+    history = PlaybookHistory(get_ace_dir())
+    atexit.register(history.close)
+    return history
+
+
+def _parse_new_keypoint(item: Any) -> Optional[Tuple[str, Optional[float], str, str]]:
+    """
+    Unpack a reflector key point (string or dict format).
+
+    Returns:
+        (text, atomicity_score, evidence, normalized_text), or None if the
+        item is malformed or has no text
+    """
+    # Support both string and dict format
+    if isinstance(item, str):
+        text = item
+        atomicity_score = None
+        evidence = ""
+    elif isinstance(item, dict):
+        text = item.get("text", "")
+        atomicity_score = item.get("atomicity_score")
+        evidence = item.get("evidence", "")
+    else:
+        return None
+
+    if not text:
+        return None
+
+    return text, atomicity_score, evidence, normalize_keypoint_text(text)
 
 
 def update_playbook_data(playbook: Dict[str, Any],
@@ -198,10 +577,7 @@ def update_playbook_data(playbook: Dict[str, Any],
     Returns:
         Updated playbook
     """
-    from delta_manager import PlaybookDelta, apply_delta, PlaybookHistory
-
     config = load_config()
-    scoring = config["scoring"]
 
     new_key_points = extraction_result.get("new_key_points", [])
     evaluations = extraction_result.get("evaluations", [])
@@ -209,36 +585,31 @@ def update_playbook_data(playbook: Dict[str, Any],
     # Create delta for this update
     delta = PlaybookDelta(source=source)
 
-    existing_names = {kp["name"] for kp in playbook["key_points"]}
-    existing_texts = {
-        kp["text"].lower().strip(): kp["name"]
-        for kp in playbook["key_points"]
-        if kp.get("status") != "archived"  # Only check active points
-    }
-
-    # Add new key points to delta
-    for item in new_key_points:
-        # Support both string and dict format
-        if isinstance(item, str):
-            text = item
-            atomicity_score = None
-            evidence = ""
-        elif isinstance(item, dict):
-            text = item.get("text", "")
-            atomicity_score = item.get("atomicity_score")
-            evidence = item.get("evidence", "")
-        else:
-            continue
+    # One name -> key point mapping shared by all phases below
+    name_to_kp = get_name_index(playbook)
+    added_names = set()
 
-        if not text:
-            continue
+    # Normalize incoming key points once, then dedup against existing texts
+    # and against earlier items of the same batch (case-insensitive)
+    candidates = [c for c in map(_parse_new_keypoint, new_key_points) if c]
+    seen = set()
+    max_num = 0
+    existing_texts = {}
+    if candidates:
+        max_num = max_keypoint_number(name_to_kp)
+        existing_texts = {
+            _keypoint_norm(kp): name
+            for name, kp in name_to_kp.items()
+            if kp.get("status") != "archived"  # Only check active points
+        }
 
-        # Check for duplicates (case-insensitive)
-        text_lower = text.lower().strip()
-        if text_lower in existing_texts:
+    # Add new key points to delta
+    for text, atomicity_score, evidence, text_norm in candidates:
+        if text_norm in existing_texts or text_norm in seen:
             continue
+        seen.add(text_norm)
 
-        name = generate_keypoint_name(existing_names)
+        name, max_num = generate_keypoint_name(max_num)
         new_kp = {
             "name": name,
             "text": text,
@@ -255,15 +626,10 @@ def update_playbook_data(playbook: Dict[str, Any],
 
         # Add to delta instead of directly to playbook
         delta.add_keypoint(new_kp, reason=f"Extracted from {source}")
-        existing_names.add(name)
-        existing_texts[text_lower] = name
+        added_names.add(name)
 
     # Update scores based on evaluations using delta
-    rating_delta = {
-        "helpful": scoring["helpful_delta"],
-        "harmful": scoring["harmful_delta"],
-        "neutral": scoring["neutral_delta"]
-    }
+    rating_delta = config["_rating_delta"]
 
     # Track score changes to calculate new scores for archival check
     score_changes = {}
@@ -273,7 +639,7 @@ def update_playbook_data(playbook: Dict[str, Any],
         rating = eval_item.get("rating", "neutral")
         justification = eval_item.get("justification", "")
 
-        if name in existing_names:
+        if name in name_to_kp or name in added_names:
             score_delta = rating_delta.get(rating, 0)
             delta.update_score(name, score_delta, rating, justification)
             # Accumulate score changes for archival check (handle multiple evaluations per keypoint)
@@ -282,7 +648,7 @@ def update_playbook_data(playbook: Dict[str, Any],
     # Check for low-scoring key points to archive using UPDATED scores
     # Calculate new score = old score + score changes from this update
     threshold = config["reflection"]["auto_cleanup_threshold"]
-    for kp in playbook["key_points"]:
+    for kp in name_to_kp.values():
         # Treat missing status as active (backward compatibility)
         # Only skip if explicitly marked as archived
         if kp.get("status") != "archived":
@@ -300,82 +666,233 @@ def update_playbook_data(playbook: Dict[str, Any],
                 )
 
     # Apply complete delta to playbook (includes additions, updates, and archival)
-    playbook = apply_delta(playbook, delta)
+    playbook = apply_delta(playbook, delta, name_to_kp)
 
     # Record complete delta history (now includes archival operations)
-    history = PlaybookHistory(get_ace_dir())
-    history.record_delta(delta, playbook)
+    get_history().record_delta(delta, playbook)
 
     return playbook
 
 
-def load_transcript(transcript_path: str) -> List[Dict[str, str]]:
+# Transcript entry types kept for reflection
+_TRANSCRIPT_TYPES = frozenset({'user', 'assistant'})
+# Raw-byte prefilter: lines without either token can't be kept, so they are
+# skipped without being parsed (whitespace-agnostic, unlike '"type":"user"')
+_TRANSCRIPT_TYPE_TOKENS = (b'"user"', b'"assistant"')
+# Markers of slash-command output in transcript messages
+_COMMAND_MARKERS = ('<command-name>', '<local-command-stdout>')
+# Same markers as raw bytes, checked once per line before decoding
+_COMMAND_MARKERS_BYTES = tuple(marker.encode() for marker in _COMMAND_MARKERS)
+
+
+def load_transcript(transcript_path: str,
+                    max_messages: Optional[int] = None) -> List[Dict[str, str]]:
     """
     Extract user and assistant messages from Claude Code transcript.
     Filters out meta-messages and command outputs.
 
     Args:
         transcript_path: Path to transcript JSONL file
+        max_messages: Keep only the most recent N messages (bounded memory
+            while streaming); None keeps all
 
     Returns:
         List of conversation messages with role and content
     """
-    conversations = []
+    conversations = deque(maxlen=max_messages)
 
     try:
-        with open(transcript_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                if not line.strip():
-                    continue
+        conversations.extend(iter_transcript(transcript_path))
+    except Exception as e:
+        print(f"Error loading transcript: {e}", file=sys.stderr)
 
-                try:
-                    entry = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
+    return list(conversations)
 
-                # Filter message types
-                if entry.get('type') not in ['user', 'assistant']:
-                    continue
-                if entry.get('isMeta') or entry.get('isVisibleInTranscriptOnly'):
-                    continue
 
-                message = entry.get('message', {})
-                role = message.get('role')
-                content = message.get('content', '')
+def iter_transcript(transcript_path: str) -> Iterator[Dict[str, str]]:
+    """
+    Lazily yield user and assistant messages from a transcript JSONL file.
+    Lines are parsed one at a time, so callers that only need part of the
+    transcript (e.g. via itertools.islice) don't pay for the rest.
 
-                if not role or not content:
-                    continue
+    Args:
+        transcript_path: Path to transcript JSONL file
+
+    Yields:
+        Conversation messages with role and content
+    """
+    with open(transcript_path, 'rb', buffering=65536) as f:
+        for raw in f:
+            if _TRANSCRIPT_TYPE_TOKENS[0] not in raw and _TRANSCRIPT_TYPE_TOKENS[1] not in raw:
+                continue
+
+            # Only lines containing a marker in raw form need the per-message check
+            has_marker = any(marker in raw for marker in _COMMAND_MARKERS_BYTES)
+
+            try:
+                entry = json_loads(raw)
+            except ValueError:
+                continue
+
+            # Filter message types
+            if entry.get('type') not in _TRANSCRIPT_TYPES:
+                continue
+            if entry.get('isMeta') or entry.get('isVisibleInTranscriptOnly'):
+                continue
+
+            message = entry.get('message', {})
+            role = message.get('role')
+            content = message.get('content', '')
+
+            if not role or not content:
+                continue
 
-                # Filter out command outputs
-                if isinstance(content, str):
-                    if '<command-name>' in content or '<local-command-stdout>' in content:
-                        continue
-
-                # Handle structured content (list of blocks)
-                if isinstance(content, list):
-                    text_parts = [
-                        item.get('text', '')
-                        for item in content
-                        if isinstance(item, dict) and item.get('type') == 'text'
-                    ]
-                    if text_parts:
-                        conversations.append({
-                            'role': role,
-                            'content': '\n'.join(text_parts)
-                        })
-                else:
-                    conversations.append({
+            # Filter out command outputs
+            if isinstance(content, str):
+                if has_marker and any(marker in content for marker in _COMMAND_MARKERS):
+                    continue
+                yield {
+                    'role': role,
+                    'content': content
+                }
+
+            # Handle structured content (list of blocks)
+            elif isinstance(content, list):
+                text_parts = [
+                    item.get('text', '')
+                    for item in content
+                    if isinstance(item, dict) and item.get('type') == 'text'
+                ]
+                if text_parts:
+                    yield {
                         'role': role,
-                        'content': content
-                    })
+                        'content': '\n'.join(text_parts)
+                    }
+            else:
+                yield {
+                    'role': role,
+                    'content': content
+                }
+
+
+@functools.lru_cache(maxsize=1)
+def _get_roles():
+    """
+    Import the Reflector and Curator roles on first use.
+
+    Returns:
+        (Reflector, Curator), or None if the role modules are missing
+    """
+    # Roles are installed in the same directory for easy import
+    try:
+        from reflector import Reflector
+        from curator import Curator
+    except ImportError as e:
+        print(f"Error: Reflector and Curator modules not found: {e}", file=sys.stderr)
+        print("Please reinstall ACE with: python install.py --force", file=sys.stderr)
+        return None
+    return Reflector, Curator
+
+
+@functools.lru_cache(maxsize=1)
+def get_vector_store_class():
+    """
+    Import the vector store on first use (keeps it off the hook fast paths).
+
+    Returns:
+        PlaybookVectorStore class, or None if the storage package is missing
+    """
+    try:
+        from storage.vector_store import PlaybookVectorStore
+    except ImportError:
+        return None
+    return PlaybookVectorStore
 
+
+def get_vector_index_state_path() -> Path:
+    """Path of the snapshot of what the vector index holds"""
+    return get_ace_dir() / "vector_index_state.json"
+
+
+def _vector_index_state(playbook: Dict[str, Any]) -> Dict[str, list]:
+    """Indexed fields of the active key points: name -> [score, text]"""
+    return {
+        kp['name']: [kp.get('score'), kp.get('text')]
+        for kp in playbook.get('key_points', [])
+        if kp.get('status') == 'active' and 'name' in kp
+    }
+
+
+def update_vector_index(playbook: Dict[str, Any]):
+    """
+    Bring the vector index in line with the playbook (errors are only logged).
+
+    Changes are computed against vector_index_state.json, a snapshot of the
+    key points the index holds that is written after each successful update,
+    so key points added or archived elsewhere (SessionEnd, cleanup scripts,
+    failed earlier updates) are caught up as well. Only new/changed active
+    key points are re-embedded and key points that are no longer active are
+    dropped. Key points whose score alone changed only get their stored
+    score updated. Without a snapshot, or with an empty index, the full
+    playbook is indexed.
+    """
+    state_path = get_vector_index_state_path()
+    state = _vector_index_state(playbook)
+    try:
+        vector_store = get_vector_store_class()()
+
+        previous_state = None
+        if vector_store.is_indexed():
+            try:
+                with open(state_path, 'rb') as f:
+                    previous_state = json_loads(f.read())
+            except (OSError, ValueError):
+                pass
+
+        if not isinstance(previous_state, dict):
+            indexed_count = vector_store.index_playbook(playbook)
+            # Below min_strategies_for_index (or on failure) nothing is indexed
+            complete = indexed_count == len(state) > 0
+        else:
+            # Only new or edited texts need embedding; a score change (the
+            # common case after evaluations) is a payload update
+            changed, rescored = [], []
+            for kp in playbook.get('key_points', []):
+                current = state.get(kp.get('name'))
+                if current is None:
+                    continue
+                previous = previous_state.get(kp['name'])
+                if not isinstance(previous, list) or previous[1:] != current[1:]:
+                    changed.append(kp)
+                elif previous[0] != current[0]:
+                    rescored.append(kp)
+            removed = [name for name in previous_state if name not in state]
+            indexed_count = vector_store.index_strategies(changed, removed, rescored)
+            complete = True
+
+        if complete:
+            _ensure_dir(str(state_path.parent))
+            _atomic_write_bytes(state_path, json_dumps(state))
+            print(f"✓ Vector index updated ({indexed_count} strategies)", file=sys.stderr)
+            return
     except Exception as e:
-        print(f"Error loading transcript: {e}", file=sys.stderr)
+        print(f"Warning: Failed to update vector index: {e}", file=sys.stderr)
+
+    # The index no longer matches the snapshot: next update indexes everything
+    try:
+        os.unlink(state_path)
+    except OSError:
+        pass
+
 
-    return conversations
+async def _run_blocking(func, *args):
+    """Run a blocking call in the default thread pool without blocking the event loop"""
+    import asyncio  # imported lazily: the tool-use hooks never need it
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args))
 
 
-async def extract_keypoints(messages: List[Dict[str, str]],
+async def extract_keypoints(messages: Iterable[Dict[str, str]],
                            playbook: Dict[str, Any],
                            diagnostic_name: str = "reflection",
                            feedback: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -384,7 +901,7 @@ async def extract_keypoints(messages: List[Dict[str, str]],
     Implements the ACE framework's role-based architecture.
 
     Args:
-        messages: Conversation history
+        messages: Conversation history (list or iterator, e.g. iter_transcript)
         playbook: Current playbook
         diagnostic_name: Name for diagnostic output file
         feedback: Optional external feedback from environment
@@ -392,19 +909,15 @@ async def extract_keypoints(messages: List[Dict[str, str]],
     Returns:
         Dictionary with new_key_points, evaluations, and curation details
     """
-    if not SDK_AVAILABLE:
+    if _get_sdk() is None:
         print("Warning: Claude Agent SDK not available, skipping extraction",
               file=sys.stderr)
         return {"new_key_points": [], "evaluations": []}
 
-    # Import roles (they are installed in the same directory for easy import)
-    try:
-        from reflector import Reflector
-        from curator import Curator
-    except ImportError as e:
-        print(f"Error: Reflector and Curator modules not found: {e}", file=sys.stderr)
-        print("Please reinstall ACE with: python install.py --force", file=sys.stderr)
+    roles = _get_roles()
+    if roles is None:
         return {"new_key_points": [], "evaluations": []}
+    Reflector, Curator = roles
 
     # Get templates directory
     templates_dir = get_ace_dir().parent / "ace_core" / "prompts"
@@ -412,12 +925,21 @@ async def extract_keypoints(messages: List[Dict[str, str]],
         # Fallback to current .claude/prompts
         templates_dir = get_ace_dir() / "prompts"
 
+    # Blocking file reads (config, reflection template) run in worker threads
+    import asyncio
+    config, reflector = await asyncio.gather(
+        _run_blocking(load_config),
+        _run_blocking(Reflector, templates_dir)
+    )
+
+    # Bound prompt size: only the most recent turns are reflected on
+    max_messages = config["reflection"].get("max_prompt_messages", 50)
+    messages = list(deque(messages, maxlen=max_messages))
+
     # Step 1: Reflector analyzes what happened
-    reflector = Reflector(templates_dir)
     reflection_result = await reflector.analyze(messages, playbook, feedback)
 
     # Step 2: Curator converts observations into actionable strategies
-    config = load_config()
     curator = Curator(config)
     curated_result = curator.curate(reflection_result, playbook)
 
@@ -432,7 +954,11 @@ async def extract_keypoints(messages: List[Dict[str, str]],
             "curated_rejected": len(curated_result.get("rejected", [])),
             "curation_summary": curator.create_learning_summary(curated_result)
         }
-        save_diagnostic(json.dumps(diagnostic_data, indent=2, ensure_ascii=False), diagnostic_name)
+        await _run_blocking(
+            save_diagnostic,
+            json_dumps(diagnostic_data, indent=True).decode('utf-8'),
+            diagnostic_name
+        )
 
     # Return curated result (compatible with existing code)
     return {
@@ -444,9 +970,24 @@ async def extract_keypoints(messages: List[Dict[str, str]],
     }
 
 
+async def close_sdk_client():
+    """
+    Disconnect the SDK client shared by reflections in this process.
+    Hooks call this before their event loop exits.
+    """
+    reflector = sys.modules.get("reflector")
+    if reflector is not None:
+        await reflector.close_client()
+
+
+# Bundled prompts directory (ace_core/prompts relative to this file)
+_DEFAULT_PROMPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prompts")
+
+
 def load_template(template_name: str) -> str:
     """
     Load prompt template from ace_core/prompts or .claude/prompts.
+    Template contents are cached until the file is modified.
 
     Args:
         template_name: Name of template file
@@ -454,23 +995,41 @@ def load_template(template_name: str) -> str:
     Returns:
         Template content as string
     """
-    # Try project-specific template first
-    project_template = get_ace_dir() / "prompts" / template_name
-    if project_template.exists():
-        with open(project_template, 'r', encoding='utf-8') as f:
-            return f.read()
-
-    # Fall back to default template
-    default_template = Path(__file__).parent.parent / "prompts" / template_name
-    if default_template.exists():
-        with open(default_template, 'r', encoding='utf-8') as f:
-            return f.read()
+    # Try project-specific template first, then fall back to default template
+    for template_path in (
+        os.path.join(get_ace_dir(), "prompts", template_name),
+        os.path.join(_DEFAULT_PROMPTS_DIR, template_name),
+    ):
+        try:
+            mtime_ns = os.stat(template_path).st_mtime_ns
+        except OSError:
+            continue
+        return _read_template(template_path, mtime_ns)
 
     raise FileNotFoundError(f"Template not found: {template_name}")
 
 
+@functools.lru_cache(maxsize=32)
+def _read_template(path: str, mtime_ns: int) -> str:
+    """Read template file (cache key: path and mtime_ns)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+# Per-process sequence number for diagnostic file names, so several
+# diagnostics saved within the same second do not overwrite each other
+_DIAG_SEQ = itertools.count()
+
+
+@functools.lru_cache(maxsize=1)
 def is_diagnostic_mode() -> bool:
-    """Check if diagnostic mode is enabled"""
+    """
+    Check if diagnostic mode is enabled (cached for the process lifetime).
+    ACE_DIAGNOSTIC=1/0 in the environment takes precedence over the flag file.
+    """
+    env_flag = os.environ.get('ACE_DIAGNOSTIC')
+    if env_flag is not None:
+        return env_flag.strip().lower() not in ('', '0', 'false', 'no', 'off')
     flag_file = get_ace_dir() / "diagnostic_mode"
     return flag_file.exists()
 
@@ -481,13 +1040,13 @@ def save_diagnostic(content: str, name: str):
 
     Args:
         content: Content to save
-        name: Base name for file (timestamp will be prepended)
+        name: Base name for file (timestamp and sequence number will be prepended)
     """
     diagnostic_dir = get_ace_dir() / "diagnostic"
-    diagnostic_dir.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(str(diagnostic_dir))
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filepath = diagnostic_dir / f"{timestamp}_{name}.txt"
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    filepath = diagnostic_dir / f"{timestamp}_{next(_DIAG_SEQ):04d}_{name}.txt"
 
     with open(filepath, 'w', encoding='utf-8') as f:
         f.write(content)
@@ -5,10 +5,33 @@ Handles incremental updates to Playbook with history tracking
 Prevents context collapse through delta-based operations
 """
 import json
+import os
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 
+# Prefer orjson (C-backed) for history I/O, fall back to stdlib json.
+# (Not shared with common.py, which imports this module.)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON from bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps_line(obj: Any) -> bytes:
+    """Serialize obj as one UTF-8 JSONL line (including trailing newline)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj, ensure_ascii=False) + '\n').encode('utf-8')
+
 
 class PlaybookDelta:
     """
@@ -16,6 +39,8 @@ class PlaybookDelta:
     Follows the ACE framework's delta update principle.
     """
 
+    __slots__ = ("timestamp", "source", "operations")
+
     def __init__(self, source: str = "unknown"):
         """
         Initialize a new delta.
@@ -88,8 +113,17 @@ class PlaybookHistory:
     """
     Manages Playbook evolution history.
     Enables rollback and analysis of learning progress.
+
+    Recorded deltas are buffered and appended in one write once
+    FLUSH_THRESHOLD entries are pending, or when flush()/close() is called.
     """
 
+    __slots__ = ("ace_dir", "history_file", "stats_file",
+                 "_pending", "_pending_stats", "_fd")
+
+    # Pending entries that trigger a write
+    FLUSH_THRESHOLD = 8
+
     def __init__(self, ace_dir: Path):
         """
         Initialize history manager.
@@ -99,6 +133,14 @@ class PlaybookHistory:
         """
         self.ace_dir = ace_dir
         self.history_file = ace_dir / "playbook_history.jsonl"
+        # Running totals for get_stats(), tagged with the history file size
+        # they correspond to (rebuilt by a full scan when out of sync)
+        self.stats_file = ace_dir / "playbook_history.stats.json"
+        # Serialized entries not yet written, and their statistics
+        self._pending: List[bytes] = []
+        self._pending_stats = self._empty_stats()
+        # Append-mode descriptor, opened on first flush
+        self._fd: Optional[int] = None
 
     def record_delta(self, delta: PlaybookDelta, playbook_snapshot: Dict[str, Any]):
         """
@@ -108,18 +150,61 @@ class PlaybookHistory:
             delta: Delta object to record
             playbook_snapshot: Current state of playbook after delta
         """
-        # Ensure directory exists
-        self.history_file.parent.mkdir(parents=True, exist_ok=True)
-
         history_entry = {
             **delta.to_dict(),
             "playbook_size": len(playbook_snapshot.get("key_points", [])),
             "avg_score": self._calculate_avg_score(playbook_snapshot)
         }
 
-        # Append to JSONL file
-        with open(self.history_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(history_entry, ensure_ascii=False) + '\n')
+        # Serialize now: the entry references live key point dicts
+        self._pending.append(_dumps_line(history_entry))
+        self._count_delta(self._pending_stats, history_entry)
+
+        if len(self._pending) >= self.FLUSH_THRESHOLD:
+            self.flush()
+
+    def flush(self):
+        """Append pending entries to the history file in a single write"""
+        if not self._pending:
+            return
+
+        if self._fd is None:
+            # Ensure directory exists
+            self.history_file.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.history_file,
+                               os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+        stats, size_before = self._load_stats_and_size()
+
+        payload = b"".join(self._pending)
+        data = memoryview(payload)
+        while data:
+            written = os.write(self._fd, data)
+            data = data[written:]
+        history_size = os.fstat(self._fd).st_size
+
+        if history_size == size_before + len(payload):
+            self._merge_stats(stats, self._pending_stats)
+            self._save_stats(stats, history_size)
+        else:
+            # Another process appended in between: its entries aren't in these
+            # totals, so drop the sidecar and let the next read rebuild it
+            try:
+                os.unlink(self.stats_file)
+            except OSError:
+                pass
+
+        self._pending = []
+        self._pending_stats = self._empty_stats()
+
+    def close(self):
+        """Flush pending entries and close the history file"""
+        try:
+            self.flush()
+        finally:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
 
     def get_recent_deltas(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -131,17 +216,37 @@ class PlaybookHistory:
         Returns:
             List of delta dictionaries
         """
+        self.flush()
+
         if not self.history_file.exists():
             return []
 
-        deltas = []
-        with open(self.history_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line.strip():
-                    deltas.append(json.loads(line))
+        if limit <= 0:
+            deltas = []
+            with open(self.history_file, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        deltas.append(_loads(line))
+            return deltas[-limit:]
+
+        # Read backwards from the end until enough lines are buffered
+        chunk_size = 64 * 1024
+        with open(self.history_file, 'rb') as f:
+            pos = f.seek(0, os.SEEK_END)
+            buf = b""
+            while pos > 0 and buf.count(b"\n") <= limit:
+                read_size = min(chunk_size, pos)
+                pos -= read_size
+                f.seek(pos)
+                buf = f.read(read_size) + buf
+
+        lines = [line for line in buf.split(b"\n") if line.strip()]
+        if pos > 0:
+            # First line may be cut off mid-record; only complete lines count
+            lines = lines[1:]
 
         # Return most recent
-        return deltas[-limit:]
+        return [_loads(line) for line in lines[-limit:]]
 
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -150,6 +255,8 @@ class PlaybookHistory:
         Returns:
             Statistics dictionary
         """
+        self.flush()
+
         if not self.history_file.exists():
             return {
                 "total_updates": 0,
@@ -158,52 +265,138 @@ class PlaybookHistory:
                 "total_score_updates": 0
             }
 
-        stats = {
-            "total_updates": 0,
-            "total_additions": 0,
-            "total_archival": 0,
-            "total_score_updates": 0,
-            "updates_by_source": {}
-        }
+        return self._load_stats()
+
+    def _load_stats(self) -> Dict[str, Any]:
+        """
+        Load running totals from the stats sidecar.
+        Falls back to a full history scan (and rewrites the sidecar) when the
+        sidecar is missing or does not match the current history file size.
+        """
+        return self._load_stats_and_size()[0]
+
+    def _load_stats_and_size(self):
+        """Load running totals, with the history file size they correspond to"""
+        try:
+            history_size = os.stat(self.history_file).st_size
+        except OSError:
+            history_size = 0
+
+        try:
+            with open(self.stats_file, 'rb') as f:
+                cached = _loads(f.read())
+            if cached.get("history_size") == history_size:
+                return cached["stats"], history_size
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+        stats = self._scan_stats()
+        if history_size:
+            self._save_stats(stats, history_size)
+        return stats, history_size
+
+    def _save_stats(self, stats: Dict[str, Any], history_size: int):
+        """Write running totals to the stats sidecar"""
+        try:
+            with open(self.stats_file, 'wb') as f:
+                f.write(_dumps_line({"history_size": history_size, "stats": stats}))
+        except OSError:
+            pass
+
+    def _scan_stats(self) -> Dict[str, Any]:
+        """Compute statistics by reading the whole history file"""
+        stats = self._empty_stats()
 
-        with open(self.history_file, 'r', encoding='utf-8') as f:
+        if not self.history_file.exists():
+            return stats
+
+        with open(self.history_file, 'rb') as f:
             for line in f:
                 if not line.strip():
                     continue
+                self._count_delta(stats, _loads(line))
 
-                delta = json.loads(line)
-                stats["total_updates"] += 1
-
-                source = delta.get("source", "unknown")
-                stats["updates_by_source"][source] = stats["updates_by_source"].get(source, 0) + 1
+        return stats
 
-                for op in delta.get("operations", []):
-                    op_type = op.get("type", "")
-                    if op_type == "add":
-                        stats["total_additions"] += 1
-                    elif op_type == "archive":
-                        stats["total_archival"] += 1
-                    elif op_type == "score_update":
-                        stats["total_score_updates"] += 1
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        """Statistics for an empty history"""
+        return {
+            "total_updates": 0,
+            "total_additions": 0,
+            "total_archival": 0,
+            "total_score_updates": 0,
+            "updates_by_source": {}
+        }
 
-        return stats
+    @staticmethod
+    def _merge_stats(stats: Dict[str, Any], other: Dict[str, Any]):
+        """Add statistics from other into stats"""
+        for key in ("total_updates", "total_additions", "total_archival", "total_score_updates"):
+            stats[key] += other[key]
+        by_source = stats["updates_by_source"]
+        for source, count in other["updates_by_source"].items():
+            by_source[source] = by_source.get(source, 0) + count
+
+    @staticmethod
+    def _count_delta(stats: Dict[str, Any], delta: Dict[str, Any]):
+        """Add one history entry to running statistics"""
+        stats["total_updates"] += 1
+
+        source = delta.get("source", "unknown")
+        stats["updates_by_source"][source] = stats["updates_by_source"].get(source, 0) + 1
+
+        for op in delta.get("operations", []):
+            op_type = op.get("type", "")
+            if op_type == "add":
+                stats["total_additions"] += 1
+            elif op_type == "archive":
+                stats["total_archival"] += 1
+            elif op_type == "score_update":
+                stats["total_score_updates"] += 1
 
     def _calculate_avg_score(self, playbook: Dict[str, Any]) -> float:
         """Calculate average score of active key points"""
-        key_points = playbook.get("key_points", [])
-        if not key_points:
-            return 0.0
+        total_score = 0
+        count = 0
+        for kp in playbook.get("key_points", ()):
+            # Only count active (non-archived) points
+            if kp.get("status") != "archived":
+                total_score += kp.get("score", 0)
+                count += 1
+        return total_score / count if count else 0.0
 
-        # Only count active (non-archived) points
-        active_points = [kp for kp in key_points if kp.get("status") != "archived"]
-        if not active_points:
-            return 0.0
 
-        total_score = sum(kp.get("score", 0) for kp in active_points)
-        return total_score / len(active_points)
+def _name_index_key(key_points: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """Identity and length of the key_points list a name index was built for"""
+    return id(key_points), len(key_points)
 
 
-def apply_delta(playbook: Dict[str, Any], delta: PlaybookDelta) -> Dict[str, Any]:
+def get_name_index(playbook: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get name to keypoint mapping for a playbook.
+    Reuses the in-memory playbook["_name_index"] while key_points is the
+    same list with the same length (apply_delta and cleanup_archived_points
+    keep it current), otherwise rebuilds and stores it.
+
+    Args:
+        playbook: Current playbook
+
+    Returns:
+        Dictionary mapping key point names to key point dicts
+    """
+    key_points = playbook["key_points"]
+    name_index = playbook.get("_name_index")
+    index_key = _name_index_key(key_points)
+    if name_index is None or playbook.get("_name_index_key") != index_key:
+        name_index = {kp["name"]: kp for kp in key_points}
+        playbook["_name_index"] = name_index
+        playbook["_name_index_key"] = index_key
+    return name_index
+
+
+def apply_delta(playbook: Dict[str, Any], delta: PlaybookDelta,
+                name_to_kp: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
     """
     Apply delta operations to playbook.
     Uses incremental updates instead of full replacement.
@@ -211,12 +404,15 @@ def apply_delta(playbook: Dict[str, Any], delta: PlaybookDelta) -> Dict[str, Any
     Args:
         playbook: Current playbook
         delta: Delta operations to apply
+        name_to_kp: Name to key point mapping from get_name_index(), if the
+            caller already has it
 
     Returns:
         Updated playbook
     """
-    # Create name to keypoint mapping for efficient lookup
-    name_to_kp = {kp["name"]: kp for kp in playbook["key_points"]}
+    # Name to keypoint mapping for efficient lookup (kept in sync on add)
+    if name_to_kp is None:
+        name_to_kp = get_name_index(playbook)
 
     for operation in delta.operations:
         op_type = operation["type"]
@@ -259,13 +455,22 @@ def apply_delta(playbook: Dict[str, Any], delta: PlaybookDelta) -> Dict[str, Any
                     "new_score": kp["score"]
                 })
 
-    # Update metadata
-    playbook["last_updated"] = delta.timestamp
+    # Added points are in the stored index already; record the new length
+    if name_to_kp is playbook.get("_name_index"):
+        playbook["_name_index_key"] = _name_index_key(playbook["key_points"])
+
+    # Update metadata (last_updated is set by save_playbook)
     playbook["last_delta_source"] = delta.source
 
     return playbook
 
 
+def _is_naive_isoformat(value: Any) -> bool:
+    """Check for a naive datetime.isoformat() string (with or without microseconds)"""
+    return (isinstance(value, str) and len(value) in (19, 26)
+            and value[10] == "T" and value[:4].isdigit())
+
+
 def cleanup_archived_points(playbook: Dict[str, Any],
                            days_threshold: int = 30,
                            keep_recent: int = 5) -> Dict[str, Any]:
@@ -285,6 +490,7 @@ def cleanup_archived_points(playbook: Dict[str, Any],
 
     now = datetime.now()
     threshold_date = now - timedelta(days=days_threshold)
+    threshold_iso = threshold_date.isoformat()
 
     archived_points = [
         kp for kp in playbook["key_points"]
@@ -302,6 +508,7 @@ def cleanup_archived_points(playbook: Dict[str, Any],
 
     # Filter key points
     cleaned_points = []
+    name_index = get_name_index(playbook)
     for kp in playbook["key_points"]:
         # Keep active points
         if kp.get("status") != "archived":
@@ -316,14 +523,23 @@ def cleanup_archived_points(playbook: Dict[str, Any],
         # Check if old enough to remove
         archived_at = kp.get("archived_at")
         if archived_at:
-            try:
-                archived_date = datetime.fromisoformat(archived_at)
-                if archived_date > threshold_date:
-                    # Not old enough, keep it
-                    cleaned_points.append(kp)
-            except (ValueError, TypeError):
-                # Keep if we can't parse the date
+            if _is_naive_isoformat(archived_at):
+                # Same format as threshold_iso: string order is time order
+                keep = archived_at > threshold_iso
+            else:
+                try:
+                    keep = datetime.fromisoformat(archived_at) > threshold_date
+                except (ValueError, TypeError):
+                    # Keep if we can't parse the date
+                    keep = True
+            if keep:
+                # Not old enough, keep it
                 cleaned_points.append(kp)
+                continue
+
+        # Removed: drop from name index as well
+        name_index.pop(kp["name"], None)
 
     playbook["key_points"] = cleaned_points
+    playbook["_name_index_key"] = _name_index_key(cleaned_points)
     return playbook
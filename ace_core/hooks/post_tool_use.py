@@ -8,12 +8,35 @@ Captures:
 - Error patterns and root causes
 - Successful alternatives for future reference
 """
-import json
 import sys
 import os
+import re
+import time
 from pathlib import Path
-from datetime import datetime
-from common import get_ace_dir, load_config
+from common import (
+    load_config, get_tool_events_path, KeywordScanner,
+    json_loads, json_dumps, append_line
+)
+
+# Literal keywords looked up in tool output by categorize_error (one scan)
+_ERROR_KEYWORDS = KeywordScanner([
+    'merge conflict', 'conflict', 'permission denied', '403', 'rejected',
+    'push', 'fatal', 'failed', 'error', 'warning', 'not found',
+    'connection refused', 'timeout', 'network', 'unreachable', 'eacces'
+])
+
+_FAILED_COUNT_RE = re.compile(r'(\d+)\s+failed')
+
+# Tools whose successful runs are still worth recording
+LEARNING_TOOLS = frozenset(['git', 'npm', 'pytest', 'cargo', 'make', 'docker'])
+
+
+def _fast_iso(ns: int) -> str:
+    """Format a time.time_ns() value as a local naive ISO timestamp with microseconds"""
+    secs, rem = divmod(ns, 1_000_000_000)
+    t = time.localtime(secs)
+    return (f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}T"
+            f"{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}.{rem // 1000:06d}")
 
 
 def should_learn_from_tool(tool_name: str, exit_code: int, stderr: str) -> bool:
@@ -33,8 +56,10 @@ def should_learn_from_tool(tool_name: str, exit_code: int, stderr: str) -> bool:
         return True
 
     # Learn from specific successful tools (for pattern recognition)
-    learning_tools = ['git', 'npm', 'pytest', 'cargo', 'make', 'docker']
-    if any(tool in tool_name.lower() for tool in learning_tools):
+    name_l = tool_name.lower()
+    if name_l in LEARNING_TOOLS:
+        return True
+    if any(tool in name_l for tool in LEARNING_TOOLS):
         return True
 
     return False
@@ -54,64 +79,66 @@ def categorize_error(tool_name: str, exit_code: int, stderr: str, stdout: str) -
         'keywords': []
     }
 
+    # Scan each stream separately (no concatenated copy)
     stderr_lower = stderr.lower()
     stdout_lower = stdout.lower()
-    combined = stderr_lower + stdout_lower
+    found = _ERROR_KEYWORDS.scan(stderr_lower) | _ERROR_KEYWORDS.scan(stdout_lower)
+    name_l = tool_name.lower()
 
     # Git errors
-    if 'git' in tool_name.lower():
-        if 'merge conflict' in combined or 'conflict' in combined:
+    if 'git' in name_l:
+        if 'merge conflict' in found or 'conflict' in found:
             error_info['category'] = 'merge_conflict'
             error_info['severity'] = 'high'
             error_info['keywords'] = ['merge', 'conflict']
-        elif 'permission denied' in combined or '403' in combined:
+        elif 'permission denied' in found or '403' in found:
             error_info['category'] = 'permission_error'
             error_info['severity'] = 'high'
             error_info['recoverable'] = False
-        elif 'rejected' in combined and 'push' in combined:
+        elif 'rejected' in found and 'push' in found:
             error_info['category'] = 'push_rejected'
             error_info['severity'] = 'medium'
-        elif 'fatal' in combined:
+        elif 'fatal' in found:
             error_info['category'] = 'git_fatal'
             error_info['severity'] = 'high'
 
     # Test failures
-    elif any(test in tool_name.lower() for test in ['pytest', 'jest', 'mocha', 'test']):
-        if 'failed' in combined or 'error' in combined:
+    elif any(test in name_l for test in ['pytest', 'jest', 'mocha', 'test']):
+        if 'failed' in found or 'error' in found:
             error_info['category'] = 'test_failure'
             error_info['severity'] = 'high'
             # Extract test count if possible
-            import re
-            match = re.search(r'(\d+)\s+failed', combined)
+            match = (_FAILED_COUNT_RE.search(stderr_lower)
+                     or _FAILED_COUNT_RE.search(stdout_lower))
             if match:
                 error_info['failed_count'] = int(match.group(1))
 
     # Build/compile errors
-    elif any(build in tool_name.lower() for build in ['npm', 'cargo', 'make', 'gcc', 'javac']):
-        if 'error' in combined or exit_code != 0:
+    elif any(build in name_l for build in ['npm', 'cargo', 'make', 'gcc', 'javac']):
+        if 'error' in found or exit_code != 0:
             error_info['category'] = 'build_error'
             error_info['severity'] = 'high'
-        if 'warning' in combined:
+        if 'warning' in found:
             error_info['category'] = 'build_warning'
             error_info['severity'] = 'low'
 
     # Docker errors
-    elif 'docker' in tool_name.lower():
-        if 'not found' in combined:
+    elif 'docker' in name_l:
+        if 'not found' in found:
             error_info['category'] = 'docker_not_found'
             error_info['severity'] = 'high'
-        elif 'permission denied' in combined:
+        elif 'permission denied' in found:
             error_info['category'] = 'docker_permission'
             error_info['severity'] = 'high'
             error_info['recoverable'] = False
 
     # Network errors
-    if any(net in combined for net in ['connection refused', 'timeout', 'network', 'unreachable']):
+    if any(net in found for net in ['connection refused', 'timeout', 'network', 'unreachable']):
         error_info['category'] = 'network_error'
         error_info['severity'] = 'medium'
 
     # Permission errors
-    if 'permission denied' in combined or 'eacces' in combined:
+    if 'permission denied' in found or 'eacces' in found:
         error_info['category'] = 'permission_error'
         error_info['severity'] = 'high'
         error_info['recoverable'] = False
@@ -123,29 +150,28 @@ def record_tool_event(tool_data: dict, error_info: dict):
     """
     Record tool execution event for later learning.
 
-    Events are stored in .claude/tool_events/ and processed by SessionEnd hook.
+    Events are appended to .claude/tool_events/session_<id>.jsonl (one compact
+    JSON object per line) and processed by SessionEnd hook.
     """
-    events_dir = get_ace_dir() / "tool_events"
-    events_dir.mkdir(parents=True, exist_ok=True)
+    session_id = tool_data.get('session_id', 'unknown')
+    events_file = get_tool_events_path(session_id)
 
     # Create event record
     event = {
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': _fast_iso(time.time_ns()),
         'tool_name': tool_data.get('toolName', 'unknown'),
         'exit_code': tool_data.get('exitCode', 0),
         'stderr': tool_data.get('stderr', '')[:1000],  # Truncate for storage
         'stdout': tool_data.get('stdout', '')[:500],
-        'command': tool_data.get('command', ''),
+        'command': tool_data.get('command', '')[:500],
         'error_category': error_info['category'],
         'error_severity': error_info['severity'],
         'recoverable': error_info['recoverable'],
-        'session_id': tool_data.get('session_id', 'unknown')
+        'session_id': session_id
     }
 
-    # Save event (use timestamp as filename to avoid collisions)
-    event_file = events_dir / f"event_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
-    with open(event_file, 'w', encoding='utf-8') as f:
-        json.dump(event, f, indent=2, ensure_ascii=False)
+    # Append event as a single line (one write per event)
+    append_line(events_file, json_dumps(event))
 
     print(f"Recorded tool event: {error_info['category']}", file=sys.stderr)
 
@@ -159,12 +185,12 @@ def main():
     """
     try:
         # Read input from stdin
-        input_json = sys.stdin.read()
+        input_json = sys.stdin.buffer.read()
         if not input_json.strip():
-            print(json.dumps({}), flush=True)
+            print("{}", flush=True)
             sys.exit(0)
 
-        tool_data = json.loads(input_json)
+        tool_data = json_loads(input_json)
 
         # Extract tool information
         tool_name = tool_data.get('toolName', '')
@@ -174,7 +200,7 @@ def main():
 
         # Decide if we should learn from this
         if not should_learn_from_tool(tool_name, exit_code, stderr):
-            print(json.dumps({}), flush=True)
+            print("{}", flush=True)
             sys.exit(0)
 
         # Categorize the error/event
@@ -184,7 +210,7 @@ def main():
         record_tool_event(tool_data, error_info)
 
         # PostToolUse cannot modify results, just output empty JSON
-        print(json.dumps({}), flush=True)
+        print("{}", flush=True)
         sys.exit(0)
 
     except Exception as e:
@@ -192,7 +218,7 @@ def main():
         import traceback
         traceback.print_exc(file=sys.stderr)
         # Don't fail - just log and continue
-        print(json.dumps({}), flush=True)
+        print("{}", flush=True)
         sys.exit(0)
 
 
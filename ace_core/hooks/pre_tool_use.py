@@ -9,12 +9,20 @@ Prevents:
 - Accidental credential exposure
 - Unsafe git operations
 """
-import json
 import sys
 import os
 import re
 from pathlib import Path
-from common import get_ace_dir, load_config
+from common import (
+    get_ace_dir, load_config, json_loads, json_dumps, append_line
+)
+
+# Optional RE2 engine: linear-time matching, no catastrophic backtracking
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
 
 
 # Dangerous patterns that should be blocked
@@ -79,6 +87,50 @@ DANGEROUS_PATTERNS = [
     },
 ]
 
+
+def _compile_pattern(pattern: str):
+    """Compile a case-insensitive pattern, with RE2 when available"""
+    if RE2_AVAILABLE:
+        try:
+            return re2.compile('(?i)' + pattern)
+        except Exception:
+            pass
+    return re.compile(pattern, re.IGNORECASE)
+
+
+# Patterns compiled once at import, in DANGEROUS_PATTERNS order
+_COMPILED_PATTERNS = [
+    (_compile_pattern(pattern_def['pattern']), pattern_def)
+    for pattern_def in DANGEROUS_PATTERNS
+]
+
+# Union of all patterns: one engine pass rules out the common (safe) case.
+# Used only as a prefilter - the leftmost match of the union is not
+# necessarily the first pattern in list order, which decides the verdict.
+_ANY_DANGEROUS = _compile_pattern(
+    '|'.join(f"(?:{pattern_def['pattern']})" for pattern_def in DANGEROUS_PATTERNS)
+)
+
+_INSECURE_PIP_RE = re.compile(r'pip\s+install.*git\+http://')
+_EVAL_VARIABLE_RE = re.compile(r'eval\s+\$|exec\s+\$')
+
+# Markers of hard-coded credentials in written file content; matched
+# case-insensitively on the raw content, so large writes aren't copied
+_CREDENTIAL_RE = re.compile(
+    '|'.join(re.escape(marker) for marker in ['password =', 'api_key =', 'secret =', 'token =']),
+    re.IGNORECASE
+)
+
+# System directories that must not be written to / edited
+_WRITE_SYSTEM_PATHS = ('/etc/', '/usr/', '/bin/', '/sbin/', '/boot/')
+_EDIT_SYSTEM_PATHS = ('/etc/', '/usr/', '/bin/', '/sbin/')
+
+# Shared result for allowed operations (never mutated)
+_SAFE = {'safe': True, 'reason': '', 'severity': 'none'}
+
+# Stand-in for a missing tool input (read-only)
+_EMPTY_INPUT = {}
+
 # Critical directories that should not be deleted
 PROTECTED_PATHS = [
     '/', '/home', '/usr', '/etc', '/var', '/bin', '/sbin',
@@ -93,19 +145,13 @@ def check_tool_safety(tool_data: dict) -> dict:
     Returns:
         Dict with 'safe', 'reason', and 'severity'
     """
-    tool_name = tool_data.get('toolName', '')
-    command = tool_data.get('input', {}).get('command', '')
-
-    # Special handling for different tools
-    if tool_name == 'Bash':
-        return check_bash_safety(command)
-    elif tool_name == 'Write':
-        return check_write_safety(tool_data.get('input', {}))
-    elif tool_name == 'Edit':
-        return check_edit_safety(tool_data.get('input', {}))
+    check = _TOOL_CHECKS.get(tool_data.get('toolName', ''))
 
     # Default: allow
-    return {'safe': True, 'reason': '', 'severity': 'none'}
+    if check is None:
+        return _SAFE
+
+    return check(tool_data.get('input') or _EMPTY_INPUT)
 
 
 def check_bash_safety(command: str) -> dict:
@@ -113,17 +159,18 @@ def check_bash_safety(command: str) -> dict:
     Check Bash command safety.
     """
     if not command:
-        return {'safe': True, 'reason': '', 'severity': 'none'}
-
-    # Check against dangerous patterns
-    for pattern_def in DANGEROUS_PATTERNS:
-        if re.search(pattern_def['pattern'], command, re.IGNORECASE):
-            return {
-                'safe': not pattern_def['block'],
-                'reason': pattern_def['reason'],
-                'severity': pattern_def['severity'],
-                'pattern': pattern_def['pattern']
-            }
+        return _SAFE
+
+    # Check against dangerous patterns (first matching pattern wins)
+    if _ANY_DANGEROUS.search(command):
+        for pattern_re, pattern_def in _COMPILED_PATTERNS:
+            if pattern_re.search(command):
+                return {
+                    'safe': not pattern_def['block'],
+                    'reason': pattern_def['reason'],
+                    'severity': pattern_def['severity'],
+                    'pattern': pattern_def['pattern']
+                }
 
     # Check for deletion of protected paths
     if 'rm' in command:
@@ -136,7 +183,7 @@ def check_bash_safety(command: str) -> dict:
                 }
 
     # Check for pip/npm install from untrusted sources
-    if re.search(r'pip\s+install.*git\+http://', command):
+    if _INSECURE_PIP_RE.search(command):
         return {
             'safe': False,
             'reason': 'Installing from non-HTTPS git URL - security risk',
@@ -144,14 +191,14 @@ def check_bash_safety(command: str) -> dict:
         }
 
     # Check for eval/exec of user input
-    if re.search(r'eval\s+\$|exec\s+\$', command):
+    if _EVAL_VARIABLE_RE.search(command):
         return {
             'safe': False,
             'reason': 'Using eval/exec with variables - code injection risk',
             'severity': 'high'
         }
 
-    return {'safe': True, 'reason': '', 'severity': 'none'}
+    return _SAFE
 
 
 def check_write_safety(write_input: dict) -> dict:
@@ -162,24 +209,23 @@ def check_write_safety(write_input: dict) -> dict:
     content = write_input.get('content', '')
 
     # Check for writing to system files
-    system_paths = ['/etc/', '/usr/', '/bin/', '/sbin/', '/boot/']
-    for sys_path in system_paths:
-        if file_path.startswith(sys_path):
-            return {
-                'safe': False,
-                'reason': f'Attempting to write to system directory: {sys_path}',
-                'severity': 'critical'
-            }
-
-    # Check for potential credential exposure
-    if any(pattern in content.lower() for pattern in ['password =', 'api_key =', 'secret =', 'token =']):
+    if file_path.startswith(_WRITE_SYSTEM_PATHS):
+        sys_path = next(p for p in _WRITE_SYSTEM_PATHS if file_path.startswith(p))
+        return {
+            'safe': False,
+            'reason': f'Attempting to write to system directory: {sys_path}',
+            'severity': 'critical'
+        }
+
+    # Check for potential credential exposure (stops at the first hit)
+    if _CREDENTIAL_RE.search(content):
         return {
             'safe': True,  # Allow but warn
             'reason': 'File contains potential credentials - ensure this is intentional',
             'severity': 'medium'
         }
 
-    return {'safe': True, 'reason': '', 'severity': 'none'}
+    return _SAFE
 
 
 def check_edit_safety(edit_input: dict) -> dict:
@@ -189,16 +235,22 @@ def check_edit_safety(edit_input: dict) -> dict:
     file_path = edit_input.get('file_path', '')
 
     # Check for editing system files
-    system_paths = ['/etc/', '/usr/', '/bin/', '/sbin/']
-    for sys_path in system_paths:
-        if file_path.startswith(sys_path):
-            return {
-                'safe': False,
-                'reason': f'Attempting to edit system file: {file_path}',
-                'severity': 'critical'
-            }
+    if file_path.startswith(_EDIT_SYSTEM_PATHS):
+        return {
+            'safe': False,
+            'reason': f'Attempting to edit system file: {file_path}',
+            'severity': 'critical'
+        }
+
+    return _SAFE
 
-    return {'safe': True, 'reason': '', 'severity': 'none'}
+
+# Per-tool safety checks, keyed by tool name; other tools are always allowed
+_TOOL_CHECKS = {
+    'Bash': lambda tool_input: check_bash_safety(tool_input.get('command', '')),
+    'Write': check_write_safety,
+    'Edit': check_edit_safety,
+}
 
 
 def log_blocked_command(tool_data: dict, safety_result: dict):
@@ -206,21 +258,19 @@ def log_blocked_command(tool_data: dict, safety_result: dict):
     Log blocked command for analysis and future improvements.
     """
     logs_dir = get_ace_dir() / "safety_logs"
-    logs_dir.mkdir(parents=True, exist_ok=True)
 
     from datetime import datetime
     log_entry = {
         'timestamp': datetime.now().isoformat(),
         'tool_name': tool_data.get('toolName', 'unknown'),
-        'command': tool_data.get('input', {}).get('command', ''),
+        'command': (tool_data.get('input') or _EMPTY_INPUT).get('command', ''),
         'reason': safety_result['reason'],
         'severity': safety_result['severity']
     }
 
     # Append to daily log file
     log_file = logs_dir / f"blocked_{datetime.now().strftime('%Y%m%d')}.jsonl"
-    with open(log_file, 'a', encoding='utf-8') as f:
-        f.write(json.dumps(log_entry, ensure_ascii=False) + '\n')
+    append_line(log_file, json_dumps(log_entry))
 
 
 def main():
@@ -234,12 +284,17 @@ def main():
     """
     try:
         # Read input from stdin
-        input_json = sys.stdin.read()
+        input_json = sys.stdin.buffer.read()
         if not input_json.strip():
-            print(json.dumps({}), flush=True)
+            print("{}", flush=True)
             sys.exit(0)
 
-        tool_data = json.loads(input_json)
+        tool_data = json_loads(input_json)
+
+        # Fast path: only Bash/Write/Edit are checked
+        if tool_data.get('toolName') not in _TOOL_CHECKS:
+            print("{}", flush=True)
+            sys.exit(0)
 
         # Check safety
         safety_result = check_tool_safety(tool_data)
@@ -250,7 +305,7 @@ def main():
             if safety_result['reason']:
                 print(f"⚠️  Safety Warning: {safety_result['reason']}", file=sys.stderr)
 
-            print(json.dumps({}), flush=True)
+            print("{}", flush=True)
             sys.exit(0)
 
         # BLOCK: Not safe
@@ -262,7 +317,7 @@ def main():
 
 {safety_result['reason']}
 
-Command: {tool_data.get('input', {}).get('command', 'N/A')}
+Command: {(tool_data.get('input') or _EMPTY_INPUT).get('command', 'N/A')}
 
 This operation was blocked by ACE safety checks to prevent potential damage.
 
@@ -281,7 +336,7 @@ Suggestion:
         import traceback
         traceback.print_exc(file=sys.stderr)
         # On error, allow execution (fail open for safety)
-        print(json.dumps({}), flush=True)
+        print("{}", flush=True)
         sys.exit(0)
 
 
@@ -3,21 +3,19 @@
 Claude ACE - PreCompact Hook
 Extracts key points before context compaction occurs
 """
-import json
 import sys
 import asyncio
+from collections import deque
 from pathlib import Path
 from common import (
-    load_playbook, save_playbook, load_transcript,
-    extract_keypoints, update_playbook_data, get_ace_dir
+    load_playbook, save_playbook, load_transcript, load_config,
+    extract_keypoints, update_playbook_data, get_ace_dir, close_sdk_client,
+    get_tool_events_path, read_legacy_events, json_loads, get_vector_store_class,
+    update_vector_index
 )
 
-# Try to import vector store for index updates
-try:
-    from storage.vector_store import PlaybookVectorStore
-    VECTOR_STORE_AVAILABLE = True
-except ImportError:
-    VECTOR_STORE_AVAILABLE = False
+# Number of recent tool events passed to the reflector as feedback
+RECENT_EVENTS = 5
 
 
 def _run_async_safe(coro):
@@ -46,17 +44,25 @@ def get_tool_feedback(session_id: str) -> dict:
     if not events_dir.exists():
         return {'errors': [], 'patterns': []}
 
-    # Collect events from this session (don't delete)
+    # Collect the most recent events from this session (don't delete)
     session_events = []
     try:
-        for event_file in events_dir.glob("event_*.json"):
-            try:
-                with open(event_file, 'r', encoding='utf-8') as f:
-                    event = json.load(f)
-                    if event.get('session_id') == session_id:
-                        session_events.append(event)
-            except Exception:
-                continue
+        # Current format: one JSONL file per session; only the tail is parsed
+        events_file = get_tool_events_path(session_id)
+        if events_file.exists():
+            with open(events_file, 'rb', buffering=65536) as f:
+                tail = deque((line for line in f if line.strip()), maxlen=RECENT_EVENTS)
+            for line in tail:
+                try:
+                    session_events.append(json_loads(line))
+                except ValueError:
+                    continue
+
+        # Legacy format: one event_*.json file per event (older than the JSONL
+        # file, so only needed when the session file has too few events)
+        if len(session_events) < RECENT_EVENTS:
+            legacy_events = [event for _, event in read_legacy_events(events_dir, session_id)]
+            session_events = legacy_events + session_events
     except Exception:
         return {'errors': [], 'patterns': []}
 
@@ -71,18 +77,17 @@ def get_tool_feedback(session_id: str) -> dict:
                 'tool': e.get('tool_name'),
                 'severity': e.get('error_severity')
             }
-            for e in session_events[-5:]  # Last 5 errors
+            for e in session_events[-RECENT_EVENTS:]
         ],
         'patterns': []
     }
 
 
-
 async def main():
     """Main entry point for precompact hook"""
     try:
         # Read hook input
-        input_data = json.load(sys.stdin)
+        input_data = json_loads(sys.stdin.buffer.read())
 
         transcript_path = input_data.get("transcript_path")
         if not transcript_path:
@@ -90,7 +95,9 @@ async def main():
             sys.exit(0)
 
         # Load conversation messages
-        messages = load_transcript(transcript_path)
+        # Only the most recent turns are reflected on, so only those are kept
+        max_messages = load_config()["reflection"].get("max_prompt_messages", 50)
+        messages = load_transcript(transcript_path, max_messages)
 
         if not messages:
             print("No messages to process", file=sys.stderr)
@@ -115,19 +122,19 @@ async def main():
         )
 
         # Update playbook with results (using Delta mechanism)
+        # Vector store (if installed) is only imported once there is work to do
         playbook = update_playbook_data(playbook, extraction_result, source="precompact")
 
-        # Save updated playbook
-        save_playbook(playbook)
-
-        # Update vector index if available
-        if VECTOR_STORE_AVAILABLE:
-            try:
-                vector_store = PlaybookVectorStore()
-                indexed_count = vector_store.index_playbook(playbook)
-                print(f"✓ Vector index updated ({indexed_count} strategies)", file=sys.stderr)
-            except Exception as e:
-                print(f"Warning: Failed to update vector index: {e}", file=sys.stderr)
+        # Save updated playbook and update the vector index (if available)
+        # concurrently; the indexer only reads the key points
+        if get_vector_store_class() is not None:
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(
+                loop.run_in_executor(None, save_playbook, playbook),
+                loop.run_in_executor(None, update_vector_index, playbook)
+            )
+        else:
+            save_playbook(playbook)
 
         new_count = len(extraction_result.get("new_key_points", []))
         eval_count = len(extraction_result.get("evaluations", []))
@@ -140,6 +147,8 @@ async def main():
         import traceback
         traceback.print_exc(file=sys.stderr)
         sys.exit(1)
+    finally:
+        await close_sdk_client()
 
 
 if __name__ == "__main__":
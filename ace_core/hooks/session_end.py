@@ -3,13 +3,17 @@
 Claude ACE - Session End Hook
 Performs comprehensive reflection at the end of a session
 """
-import json
+import os
 import sys
 import asyncio
+import threading
+from collections import Counter
 from pathlib import Path
 from common import (
-    load_playbook, save_playbook, load_transcript,
-    extract_keypoints, update_playbook_data, get_ace_dir
+    load_playbook, save_playbook, load_transcript, load_config,
+    extract_keypoints, update_playbook_data, get_ace_dir, close_sdk_client,
+    get_tool_events_path, read_legacy_events, json_loads, get_vector_store_class,
+    update_vector_index
 )
 
 
@@ -26,6 +30,17 @@ def _run_async_safe(coro):
         return loop.run_until_complete(coro)
 
 
+def delete_event_files(paths: list):
+    """Delete processed tool event files, tolerating already-removed ones"""
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            print(f"Warning: Failed to delete event file {path}: {e}", file=sys.stderr)
+
+
 def process_tool_events(session_id: str) -> dict:
     """
     Process tool events collected during the session.
@@ -41,17 +56,28 @@ def process_tool_events(session_id: str) -> dict:
     # Collect events from this session
     session_events = []
     try:
-        for event_file in events_dir.glob("event_*.json"):
-            try:
-                with open(event_file, 'r', encoding='utf-8') as f:
-                    event = json.load(f)
-                    if event.get('session_id') == session_id:
-                        session_events.append(event)
-                        # Delete processed event
-                        event_file.unlink()
-            except Exception as e:
-                print(f"Warning: Failed to process event file {event_file}: {e}", file=sys.stderr)
-                continue
+        # Legacy format: one event_*.json file per event
+        legacy_events = read_legacy_events(events_dir, session_id)
+        session_events.extend(event for _, event in legacy_events)
+        processed_files = [event_path for event_path, _ in legacy_events]
+
+        # Current format: one JSONL file per session
+        events_file = get_tool_events_path(session_id)
+        if events_file.exists():
+            with open(events_file, 'rb', buffering=65536) as f:
+                for line in f:
+                    try:
+                        session_events.append(json_loads(line))
+                    except ValueError:
+                        continue
+            processed_files.append(events_file)
+
+        # Delete processed events (only this session's files) in the
+        # background, overlapping with reflection; the thread is not a
+        # daemon, so the hook still waits for it before exiting
+        if processed_files:
+            threading.Thread(target=delete_event_files, args=(processed_files,),
+                             name="ace-event-cleanup").start()
     except Exception as e:
         print(f"Warning: Failed to read tool events: {e}", file=sys.stderr)
         return {'errors': [], 'patterns': []}
@@ -65,31 +91,33 @@ def process_tool_events(session_id: str) -> dict:
         'patterns': []
     }
 
-    # Group by error category
-    error_by_category = {}
+    # Count events per error category; only the first event of each
+    # category is used for the summary, so no per-category lists are kept
+    category_counts = Counter()
+    first_events = {}
     for event in session_events:
         category = event.get('error_category', 'unknown')
-        if category not in error_by_category:
-            error_by_category[category] = []
-        error_by_category[category].append(event)
+        category_counts[category] += 1
+        first_events.setdefault(category, event)
 
     # Create learning points from errors
-    for category, events in error_by_category.items():
-        if len(events) >= 2:
+    for category, event in first_events.items():
+        count = category_counts[category]
+        if count >= 2:
             # Repeated error - important pattern
             error_summary['patterns'].append({
                 'category': category,
-                'count': len(events),
-                'severity': events[0].get('error_severity', 'medium'),
-                'sample_error': events[0].get('stderr', '')[:200]
+                'count': count,
+                'severity': event.get('error_severity', 'medium'),
+                'sample_error': event.get('stderr', '')[:200]
             })
         else:
             # Single error
             error_summary['errors'].append({
                 'category': category,
-                'tool': events[0].get('tool_name'),
-                'command': events[0].get('command', '')[:100],
-                'stderr': events[0].get('stderr', '')[:200]
+                'tool': event.get('tool_name'),
+                'command': event.get('command', '')[:100],
+                'stderr': event.get('stderr', '')[:200]
             })
 
     print(f"Processed {len(session_events)} tool events: {len(error_summary['errors'])} errors, "
@@ -103,7 +131,7 @@ async def main():
     """Main entry point for session end hook"""
     try:
         # Read hook input
-        input_data = json.load(sys.stdin)
+        input_data = json_loads(sys.stdin.buffer.read())
 
         transcript_path = input_data.get("transcript_path")
         if not transcript_path:
@@ -111,7 +139,9 @@ async def main():
             sys.exit(0)
 
         # Load conversation messages
-        messages = load_transcript(transcript_path)
+        # Only the most recent turns are reflected on, so only those are kept
+        max_messages = load_config()["reflection"].get("max_prompt_messages", 50)
+        messages = load_transcript(transcript_path, max_messages)
 
         if not messages:
             print("No messages to process", file=sys.stderr)
@@ -120,12 +150,14 @@ async def main():
         print(f"Session End: Processing {len(messages)} messages for final reflection",
               file=sys.stderr)
 
-        # Load current playbook
-        playbook = load_playbook()
-
-        # Process tool events from this session
+        # Load current playbook and process tool events from this session
+        # (independent file I/O, run concurrently in the thread pool)
         session_id = input_data.get("session_id", "unknown")
-        tool_feedback = process_tool_events(session_id)
+        loop = asyncio.get_running_loop()
+        playbook, tool_feedback = await asyncio.gather(
+            loop.run_in_executor(None, load_playbook),
+            loop.run_in_executor(None, process_tool_events, session_id)
+        )
 
         # Extract comprehensive learnings from entire session
         # Include tool errors as additional feedback
@@ -139,8 +171,16 @@ async def main():
         # Update playbook with results (using Delta mechanism)
         playbook = update_playbook_data(playbook, extraction_result, source="session_end")
 
-        # Save updated playbook
-        save_playbook(playbook)
+        # Save updated playbook and update the vector index (if available)
+        # concurrently, so the next session searches this session's key points
+        if get_vector_store_class() is not None:
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(
+                loop.run_in_executor(None, save_playbook, playbook),
+                loop.run_in_executor(None, update_vector_index, playbook)
+            )
+        else:
+            save_playbook(playbook)
 
         new_count = len(extraction_result.get("new_key_points", []))
         eval_count = len(extraction_result.get("evaluations", []))
@@ -156,6 +196,8 @@ async def main():
         import traceback
         traceback.print_exc(file=sys.stderr)
         sys.exit(1)
+    finally:
+        await close_sdk_client()
 
 
 if __name__ == "__main__":
@@ -5,22 +5,15 @@ Injects playbook knowledge at the start of new sessions
 
 Enhanced with vector search for semantic relevance
 """
-import json
+import heapq
 import sys
 from pathlib import Path
 from common import (
     load_playbook, load_template, is_diagnostic_mode,
-    save_diagnostic, get_ace_dir, load_config
+    save_diagnostic, get_ace_dir, load_config, iter_hook_input, json_dumps,
+    get_vector_store_class
 )
 
-# Try to import vector store
-try:
-    from storage.vector_store import PlaybookVectorStore
-    VECTOR_SEARCH_AVAILABLE = True
-except ImportError:
-    VECTOR_SEARCH_AVAILABLE = False
-    print("Note: Vector search not available, using fallback method", file=sys.stderr)
-
 
 def is_first_message(session_id: str) -> bool:
     """
@@ -34,14 +27,14 @@ def is_first_message(session_id: str) -> bool:
     """
     session_file = get_ace_dir() / "last_session.txt"
 
-    if session_file.exists():
-        try:
-            last_session_id = session_file.read_text().strip()
-            return session_id != last_session_id
-        except:
-            return True
+    # Single open/read; a missing or unreadable file means a new session
+    try:
+        with open(session_file, 'r') as f:
+            last_session_id = f.read().strip()
+    except (OSError, ValueError):
+        return True
 
-    return True
+    return session_id != last_session_id
 
 
 def mark_session(session_id: str):
@@ -70,9 +63,15 @@ def format_playbook_with_vector_search(playbook: dict, user_query: str) -> str:
     config = load_config()
     max_points = config["reflection"]["max_keypoints_to_inject"]
 
+    # Nothing to inject: skip vector store setup (and first-time indexing)
+    if max_points <= 0 or not any(
+        kp.get('status') != 'archived' for kp in playbook.get('key_points', [])
+    ):
+        return ""
+
     try:
         # Initialize vector store
-        vector_store = PlaybookVectorStore()
+        vector_store = get_vector_store_class()()
 
         # Check if index exists, if not create it
         if not vector_store.is_indexed():
@@ -127,25 +126,23 @@ def format_playbook_simple(playbook: dict) -> str:
     if not key_points:
         return ""
 
-    # Filter out archived key points (only inject active ones)
-    key_points = [kp for kp in key_points if kp.get('status') != 'archived']
+    # Filter out archived key points (only inject active ones), and by score
+    # if configured
+    only_positive = hooks_config.get("inject_only_positive_scores", True)
+    candidates = (
+        kp for kp in key_points
+        if kp.get('status') != 'archived'
+        and (not only_positive or kp.get('score', 0) >= 0)
+    )
 
-    # Filter by score if configured
-    if hooks_config.get("inject_only_positive_scores", True):
-        key_points = [kp for kp in key_points if kp.get('score', 0) >= 0]
+    # Highest scores first, limited to the number of injected points
+    # (nlargest keeps the original order among equal scores, like sorted)
+    max_points = config["reflection"]["max_keypoints_to_inject"]
+    top_kps = heapq.nlargest(max_points, candidates, key=lambda x: x.get('score', 0))
 
-    if not key_points:
+    if not top_kps:
         return ""
 
-    # Sort by score (highest first)
-    sorted_kps = sorted(key_points,
-                       key=lambda x: x.get('score', 0),
-                       reverse=True)
-
-    # Limit number of injected points
-    max_points = config["reflection"]["max_keypoints_to_inject"]
-    top_kps = sorted_kps[:max_points]
-
     # Format key points with IDs for reference
     key_points_text = "\n".join(
         f"- [{kp['name']}] {kp['text']}"
@@ -160,13 +157,21 @@ def format_playbook_simple(playbook: dict) -> str:
 def main():
     """Main entry point for user prompt inject hook"""
     try:
-        # Read hook input
-        input_data = json.load(sys.stdin)
+        # Read hook input; stop as soon as the session_id shows this is not
+        # a new session (the rest of the payload is then not needed)
+        input_data = {}
+        for key, value in iter_hook_input():
+            input_data[key] = value
+            if key == 'session_id' and not is_first_message(value):
+                print("{}", flush=True)
+                sys.exit(0)
+
         session_id = input_data.get('session_id', 'unknown')
 
-        # Check if this is a new session
-        if not is_first_message(session_id):
-            print(json.dumps({}), flush=True)
+        # Check if this is a new session (already checked above when the
+        # input carried a session_id)
+        if 'session_id' not in input_data and not is_first_message(session_id):
+            print("{}", flush=True)
             sys.exit(0)
 
         # Load playbook
@@ -175,8 +180,13 @@ def main():
         # Try to get user message for vector search
         user_message = input_data.get('userMessage', '')
 
-        # Format playbook with best available method
-        if VECTOR_SEARCH_AVAILABLE and user_message:
+        # Format playbook with best available method (vector store is only
+        # imported here, after the not-first-message fast exit)
+        vector_search_available = get_vector_store_class() is not None
+        if not vector_search_available:
+            print("Note: Vector search not available, using fallback method", file=sys.stderr)
+
+        if vector_search_available and user_message:
             print("Using vector search for strategy selection", file=sys.stderr)
             context = format_playbook_with_vector_search(playbook, user_message)
         else:
@@ -186,7 +196,7 @@ def main():
 
         # If no context to inject, return empty
         if not context:
-            print(json.dumps({}), flush=True)
+            print("{}", flush=True)
             sys.exit(0)
 
         # Save diagnostic if enabled
@@ -201,9 +211,10 @@ def main():
             }
         }
 
-        # Output response
-        sys.stdout.reconfigure(encoding='utf-8')
-        print(json.dumps(response, ensure_ascii=False), flush=True)
+        # Output response (UTF-8 JSON bytes, written without re-encoding)
+        sys.stdout.flush()
+        sys.stdout.buffer.write(json_dumps(response) + b'\n')
+        sys.stdout.buffer.flush()
 
         # Mark this session as seen
         mark_session(session_id)
@@ -213,7 +224,7 @@ def main():
         import traceback
         traceback.print_exc(file=sys.stderr)
         # Return empty response on error
-        print(json.dumps({}), flush=True)
+        print("{}", flush=True)
         sys.exit(1)
 
 
@@ -8,6 +8,98 @@ import json
 from typing import List, Dict, Any
 from datetime import datetime
 
+# Roles are installed next to the hooks, so common is importable
+from common import KeywordScanner, normalize_keypoint_text, char_ngram_minhash
+
+# Optional MinHash LSH for near-duplicate detection
+try:
+    from datasketch import MinHashLSH
+    DATASKETCH_AVAILABLE = True
+except ImportError:
+    DATASKETCH_AVAILABLE = False
+
+# Estimated Jaccard similarity (character 3-grams) above which an
+# observation counts as a near-duplicate of an existing key point
+NEAR_DUPLICATE_THRESHOLD = 0.85
+
+
+# Generic advice (common anti-patterns) that disqualifies a key point
+GENERIC_PATTERNS = (
+    "be helpful",
+    "be clear",
+    "be concise",
+    "understand context",
+    "user wants",
+    "provide good",
+    "make sure",
+    "always try",
+    "something",
+    "various",
+    "sometimes"
+)
+
+# Specific indicators; a key point needs at least one
+SPECIFIC_INDICATORS = (
+    "use",
+    "when",
+    "if",
+    "check",
+    "run",
+    "call",
+    "read",
+    "write",
+    "create",
+    "update",
+    "delete",
+    "prefer",
+    "avoid",
+    ".py",
+    ".js",
+    ".ts",
+    "command",
+    "tool",
+    "function",
+    "file",
+    "directory"
+)
+
+
+class _NearDuplicateIndex:
+    """
+    MinHash LSH index over character 3-grams of normalized texts.
+    Without datasketch it holds nothing and never reports a match, leaving
+    only the exact (normalized) duplicate check.
+    """
+
+    NUM_PERM = 64
+
+    def __init__(self, keys):
+        self._lsh = None
+        self._keys = set()
+        if DATASKETCH_AVAILABLE:
+            self._lsh = MinHashLSH(threshold=NEAR_DUPLICATE_THRESHOLD, num_perm=self.NUM_PERM)
+            for key in keys:
+                self.add(key)
+
+    def _minhash(self, key: str):
+        return char_ngram_minhash(key, self.NUM_PERM)
+
+    def contains(self, key: str) -> bool:
+        """True if an indexed text is a near-duplicate of key"""
+        if self._lsh is None or not self._keys:
+            return False
+        return bool(self._lsh.query(self._minhash(key)))
+
+    def add(self, key: str):
+        if self._lsh is None or key in self._keys:
+            return
+        self._keys.add(key)
+        self._lsh.insert(key, self._minhash(key))
+
+
+_GENERIC_MATCHER = KeywordScanner(GENERIC_PATTERNS)
+_SPECIFIC_MATCHER = KeywordScanner(SPECIFIC_INDICATORS)
+
 
 class Curator:
     """
@@ -55,15 +147,17 @@ class Curator:
         rejected_points = []
 
         existing_texts = {
-            kp["text"].lower().strip()
+            normalize_keypoint_text(kp["text"])
             for kp in existing_playbook.get("key_points", [])
             if kp.get("status") != "archived"
         }
+        near_duplicates = _NearDuplicateIndex(existing_texts)
 
         for obs in observations:
             if isinstance(obs, str):
                 # Old format: just text
-                if obs.lower().strip() in existing_texts:
+                key = normalize_keypoint_text(obs)
+                if key in existing_texts or near_duplicates.contains(key):
                     rejected_points.append({
                         "text": obs,
                         "reason": "duplicate"
@@ -90,7 +184,8 @@ class Curator:
                     continue
 
                 # Duplicate check
-                if text.lower().strip() in existing_texts:
+                key = normalize_keypoint_text(text)
+                if key in existing_texts or near_duplicates.contains(key):
                     rejected_points.append({
                         "text": text,
                         "reason": "duplicate"
@@ -113,7 +208,8 @@ class Curator:
                 })
 
                 # Add to existing texts to prevent duplicates within this batch
-                existing_texts.add(text.lower().strip())
+                existing_texts.add(key)
+                near_duplicates.add(key)
 
         return {
             "new_key_points": curated_points,
@@ -137,8 +233,6 @@ class Curator:
         Returns:
             True if meets quality standards
         """
-        text_lower = text.lower()
-
         # Reject if too short (likely incomplete)
         if len(text) < 20:
             return False
@@ -147,52 +241,14 @@ class Curator:
         if len(text) > 300:
             return False
 
-        # Reject generic advice (common anti-patterns)
-        generic_patterns = [
-            "be helpful",
-            "be clear",
-            "be concise",
-            "understand context",
-            "user wants",
-            "provide good",
-            "make sure",
-            "always try",
-            "something",
-            "various",
-            "sometimes"
-        ]
+        text_lower = text.lower()
 
-        for pattern in generic_patterns:
-            if pattern in text_lower:
-                return False
+        # Reject generic advice (common anti-patterns)
+        if _GENERIC_MATCHER.contains_any(text_lower):
+            return False
 
         # Require specific indicators (at least one)
-        specific_indicators = [
-            "use",
-            "when",
-            "if",
-            "check",
-            "run",
-            "call",
-            "read",
-            "write",
-            "create",
-            "update",
-            "delete",
-            "prefer",
-            "avoid",
-            ".py",
-            ".js",
-            ".ts",
-            "command",
-            "tool",
-            "function",
-            "file",
-            "directory"
-        ]
-
-        has_specific = any(indicator in text_lower for indicator in specific_indicators)
-        if not has_specific:
+        if not _SPECIFIC_MATCHER.contains_any(text_lower):
             return False
 
         return True
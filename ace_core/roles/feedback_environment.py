@@ -5,10 +5,36 @@ Provides external feedback for agent execution validation.
 Corresponds to the Environment component in the ACE framework.
 """
 import json
+import re
+from collections import Counter
 from typing import Dict, Any, Optional, List
 from pathlib import Path
 from datetime import datetime
 
+# Roles are installed next to the hooks, so common is importable
+from common import append_line, json_dumps, json_loads
+
+# Date part of an entry's serialized timestamp, read without parsing the line
+_TIMESTAMP_DATE_RE = re.compile(rb'"timestamp":\s*"(\d{4}-\d{2}-\d{2})')
+
+# Explicit feedback markers in user messages
+POSITIVE_FEEDBACK_PATTERNS = (
+    "✓", "👍", "很有用", "有帮助",
+    "good advice", "helpful", "works well", "correct",
+)
+NEGATIVE_FEEDBACK_PATTERNS = (
+    "✗", "👎", "不对", "错误", "不好",
+    "wrong", "incorrect", "doesn't work",
+)
+
+# One case-insensitive alternation per rating, so each is a single scan
+_POSITIVE_FEEDBACK_RE = re.compile(
+    '|'.join(re.escape(p) for p in POSITIVE_FEEDBACK_PATTERNS), re.IGNORECASE
+)
+_NEGATIVE_FEEDBACK_RE = re.compile(
+    '|'.join(re.escape(p) for p in NEGATIVE_FEEDBACK_PATTERNS), re.IGNORECASE
+)
+
 
 class FeedbackEnvironment:
     """
@@ -45,9 +71,6 @@ class FeedbackEnvironment:
             feedback_type: Type of feedback (user_rating, execution_result, ground_truth)
             feedback_data: Feedback details
         """
-        # Ensure directory exists
-        self.feedback_file.parent.mkdir(parents=True, exist_ok=True)
-
         feedback_entry = {
             "timestamp": datetime.now().isoformat(),
             "session_id": session_id,
@@ -57,8 +80,7 @@ class FeedbackEnvironment:
         }
 
         # Append to feedback file
-        with open(self.feedback_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(feedback_entry, ensure_ascii=False) + '\n')
+        append_line(self.feedback_file, json_dumps(feedback_entry))
 
     def get_session_feedback(self, session_id: str) -> List[Dict[str, Any]]:
         """
@@ -73,13 +95,17 @@ class FeedbackEnvironment:
         if not self.feedback_file.exists():
             return []
 
+        # Entries of other sessions can't contain the serialized session_id,
+        # so they are skipped with a substring check instead of a JSON parse
+        session_marker = json.dumps(session_id, ensure_ascii=False).encode('utf-8')
+
         feedback_list = []
-        with open(self.feedback_file, 'r', encoding='utf-8') as f:
+        with open(self.feedback_file, 'rb', buffering=65536) as f:
             for line in f:
-                if not line.strip():
+                if session_marker not in line:
                     continue
 
-                entry = json.loads(line)
+                entry = json_loads(line)
                 if entry.get("session_id") == session_id:
                     feedback_list.append(entry)
 
@@ -140,50 +166,19 @@ class FeedbackEnvironment:
         Returns:
             Parsed feedback or None if no feedback found
         """
-        user_lower = user_input.lower().strip()
-
-        # Positive feedback indicators
-        positive_patterns = [
-            ("✓", "helpful"),
-            ("👍", "helpful"),
-            ("很有用", "helpful"),
-            ("有帮助", "helpful"),
-            ("good advice", "helpful"),
-            ("helpful", "helpful"),
-            ("works well", "helpful"),
-            ("correct", "helpful"),
-        ]
-
-        # Negative feedback indicators
-        negative_patterns = [
-            ("✗", "harmful"),
-            ("👎", "harmful"),
-            ("不对", "harmful"),
-            ("错误", "harmful"),
-            ("不好", "harmful"),
-            ("wrong", "harmful"),
-            ("incorrect", "harmful"),
-            ("doesn't work", "harmful"),
-        ]
-
-        # Check patterns
-        for pattern, rating in positive_patterns:
-            if pattern in user_lower:
-                return {
-                    "rating": rating,
-                    "source": "user_explicit",
-                    "original_text": user_input
-                }
-
-        for pattern, rating in negative_patterns:
-            if pattern in user_lower:
-                return {
-                    "rating": rating,
-                    "source": "user_explicit",
-                    "original_text": user_input
-                }
+        # Positive markers take precedence over negative ones
+        if _POSITIVE_FEEDBACK_RE.search(user_input):
+            rating = "helpful"
+        elif _NEGATIVE_FEEDBACK_RE.search(user_input):
+            rating = "harmful"
+        else:
+            return None
 
-        return None
+        return {
+            "rating": rating,
+            "source": "user_explicit",
+            "original_text": user_input
+        }
 
     def get_feedback_summary(self, days: int = 7) -> Dict[str, Any]:
         """
@@ -205,40 +200,48 @@ class FeedbackEnvironment:
             }
 
         cutoff_date = datetime.now() - timedelta(days=days)
-        summary = {
-            "total_feedback": 0,
-            "by_type": {},
-            "positive_count": 0,
-            "negative_count": 0,
-            "recent_feedback": []
-        }
+        cutoff_day = cutoff_date.strftime('%Y-%m-%d').encode('ascii')
+        by_type = Counter()
+        positive_count = negative_count = 0
+        recent_feedback = []
 
-        with open(self.feedback_file, 'r', encoding='utf-8') as f:
+        with open(self.feedback_file, 'rb', buffering=65536) as f:
             for line in f:
                 if not line.strip():
                     continue
 
-                entry = json.loads(line)
+                # ISO dates compare as strings: entries from before the cutoff
+                # day are skipped without parsing
+                match = _TIMESTAMP_DATE_RE.search(line)
+                if match and match.group(1) < cutoff_day:
+                    continue
+
+                entry = json_loads(line)
                 entry_date = datetime.fromisoformat(entry["timestamp"])
 
                 if entry_date < cutoff_date:
                     continue
 
-                summary["total_feedback"] += 1
-
-                fb_type = entry.get("type", "unknown")
-                summary["by_type"][fb_type] = summary["by_type"].get(fb_type, 0) + 1
+                by_type[entry.get("type", "unknown")] += 1
 
                 # Count positive/negative
                 data = entry.get("data", {})
-                if data.get("rating") == "helpful" or data.get("success"):
-                    summary["positive_count"] += 1
-                elif data.get("rating") == "harmful" or data.get("success") is False:
-                    summary["negative_count"] += 1
+                rating = data.get("rating")
+                success = data.get("success")
+                if rating == "helpful" or success:
+                    positive_count += 1
+                elif rating == "harmful" or success is False:
+                    negative_count += 1
 
-                summary["recent_feedback"].append(entry)
+                recent_feedback.append(entry)
 
-        return summary
+        return {
+            "total_feedback": len(recent_feedback),
+            "by_type": dict(by_type),
+            "positive_count": positive_count,
+            "negative_count": negative_count,
+            "recent_feedback": recent_feedback
+        }
 
 
 class SimpleFeedbackCollector:
@@ -4,9 +4,15 @@ Claude ACE - Reflector Role
 Analyzes conversation trajectories to identify what worked and what didn't.
 Corresponds to the Reflector component in the ACE framework.
 """
+import asyncio
 import json
+import re
 import sys
-from typing import List, Dict, Any, Optional
+import uuid
+from collections import Counter
+from io import StringIO
+from json.encoder import encode_basestring
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 
@@ -19,6 +25,158 @@ try:
 except ImportError:
     SDK_AVAILABLE = False
 
+# Prefer orjson (C-backed) for serializing trajectories and parsing responses
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Process-wide SDK client, reused across analyze() calls. The client and its
+# lock belong to the event loop that created them; a new loop gets a new client.
+_sdk_client = None
+_sdk_client_loop = None
+_sdk_client_lock: Optional[asyncio.Lock] = None
+
+
+def _client_lock() -> asyncio.Lock:
+    """Get the client lock for the running event loop"""
+    global _sdk_client, _sdk_client_loop, _sdk_client_lock
+    loop = asyncio.get_running_loop()
+    if _sdk_client_loop is not loop:
+        # Client connected on a previous (closed) loop cannot be reused
+        _sdk_client = None
+        _sdk_client_loop = loop
+        _sdk_client_lock = asyncio.Lock()
+    return _sdk_client_lock
+
+
+async def _get_client():
+    """Get the shared SDK client, connecting it on first use (caller holds the lock)"""
+    global _sdk_client
+    if _sdk_client is None:
+        options = ClaudeAgentOptions(
+            max_turns=1,
+            permission_mode="bypassPermissions",
+            allowed_tools=[]
+        )
+        client = ClaudeSDKClient(options=options)
+        await client.connect()
+        _sdk_client = client
+    return _sdk_client
+
+
+async def _drop_client():
+    """Disconnect and forget the shared SDK client (caller holds the lock)"""
+    global _sdk_client
+    client, _sdk_client = _sdk_client, None
+    if client is not None:
+        try:
+            await client.disconnect()
+        except:
+            pass
+
+
+async def close_client():
+    """Disconnect the shared SDK client. Call before the event loop shuts down."""
+    if _sdk_client is None:
+        return
+    async with _client_lock():
+        await _drop_client()
+
+
+def _format_playbook_for_prompt(playbook: Dict[str, Any]) -> str:
+    """
+    Format active key points as a JSON object of name -> text.
+
+    Output matches json.dumps(..., indent=2, ensure_ascii=False) of that
+    mapping, but is written straight into one buffer without building an
+    intermediate dict.
+    """
+    buf = StringIO()
+    write = buf.write
+    sep = "{\n  "
+    for kp in playbook.get("key_points", []):
+        if kp.get("status") == "archived":  # Only include active points
+            continue
+        write(sep)
+        write(encode_basestring(kp["name"]))
+        write(": ")
+        write(encode_basestring(kp["text"]))
+        sep = ",\n  "
+    if sep == "{\n  ":
+        return "{}"
+    write("\n}")
+    return buf.getvalue()
+
+
+# Characters that change the scanner state: quotes and escapes inside
+# strings, braces outside them
+_JSON_SCAN_RE = re.compile(r'["\\{}]')
+
+
+def _find_json_bounds(text: str) -> Optional[Tuple[int, int]]:
+    """
+    Locate the first balanced top-level JSON object in text.
+
+    Tracks string/escape state and brace depth, so braces inside string
+    literals don't count. Only the state-changing characters are visited.
+
+    Returns:
+        [start, end) of the object, or None if text has no balanced object
+    """
+    depth = 0
+    start = -1
+    in_str = False
+    esc_pos = -2  # Position of the last unescaped backslash in a string
+    for match in _JSON_SCAN_RE.finditer(text):
+        c = match.group()
+        i = match.start()
+        if in_str:
+            if i == esc_pos + 1:
+                continue  # Escaped by the preceding backslash
+            if c == '\\':
+                esc_pos = i
+            elif c == '"':
+                in_str = False
+            continue
+        if c == '"':
+            # Quotes in prose around the object don't start strings
+            if depth:
+                in_str = True
+        elif c == '{':
+            if depth == 0:
+                start = i
+            depth += 1
+        elif c == '}' and depth:
+            depth -= 1
+            if depth == 0:
+                return start, i + 1
+    return None
+
+
+def _find_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode the first balanced JSON object embedded in text (e.g. inside a
+    markdown fence or surrounded by prose). Only that object is parsed;
+    later objects are never tried as a fallback.
+
+    Returns:
+        The decoded object, or None if text contains no balanced object
+
+    Raises:
+        json.JSONDecodeError: If the first object is not valid JSON
+    """
+    bounds = _find_json_bounds(text)
+    if bounds is None:
+        return None
+    json_str = text[bounds[0]:bounds[1]]
+    if ORJSON_AVAILABLE:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        return orjson.loads(json_str)
+    return json.loads(json_str)
+
 
 class Reflector:
     """
@@ -79,13 +237,6 @@ class Reflector:
                 "raw_reflection": ""
             }
 
-        # Format playbook for prompt
-        playbook_dict = {
-            kp["name"]: kp["text"]
-            for kp in playbook.get("key_points", [])
-            if kp.get("status") != "archived"  # Only include active points
-        }
-
         # Prepare trajectories with optional feedback
         trajectories_data = {
             "messages": messages,
@@ -95,57 +246,52 @@ class Reflector:
         if feedback:
             trajectories_data["external_feedback"] = feedback
 
-        # Create reflection prompt
+        # Create reflection prompt (trajectories serialized compactly to save tokens)
+        if ORJSON_AVAILABLE:
+            trajectories_json = orjson.dumps(trajectories_data).decode('utf-8')
+        else:
+            trajectories_json = json.dumps(trajectories_data, ensure_ascii=False,
+                                           separators=(',', ':'))
         prompt = self.reflection_template.format(
-            trajectories=json.dumps(trajectories_data, indent=2, ensure_ascii=False),
-            playbook=json.dumps(playbook_dict, indent=2, ensure_ascii=False)
-        )
-
-        # Use Claude SDK for reflection
-        options = ClaudeAgentOptions(
-            max_turns=1,
-            permission_mode="bypassPermissions",
-            allowed_tools=[]
+            trajectories=trajectories_json,
+            playbook=_format_playbook_for_prompt(playbook)
         )
 
-        response_text = ""
-        client = ClaudeSDKClient(options=options)
-
-        try:
-            await client.connect()
-            await client.query(prompt)
-
-            async for message in client.receive_response():
-                if isinstance(message, AssistantMessage):
-                    for block in message.content:
-                        if isinstance(block, TextBlock):
-                            response_text += block.text
+        # Use Claude SDK for reflection (shared client, one query at a time)
+        response_parts: List[str] = []
 
-        except Exception as e:
-            print(f"Error during reflection: {e}", file=sys.stderr)
-            return {
-                "observations": [],
-                "patterns": [],
-                "evaluations": [],
-                "raw_reflection": "",
-                "error": str(e)
-            }
-        finally:
+        async with _client_lock():
             try:
-                await client.disconnect()
-            except:
-                pass
+                client = await _get_client()
+                # Separate session per reflection so earlier prompts don't leak in
+                await client.query(prompt, session_id=uuid.uuid4().hex)
+
+                async for message in client.receive_response():
+                    if isinstance(message, AssistantMessage):
+                        for block in message.content:
+                            if isinstance(block, TextBlock):
+                                response_parts.append(block.text)
+
+            except Exception as e:
+                print(f"Error during reflection: {e}", file=sys.stderr)
+                # Client state is unknown after a failure; reconnect next time
+                await _drop_client()
+                return {
+                    "observations": [],
+                    "patterns": [],
+                    "evaluations": [],
+                    "raw_reflection": "",
+                    "error": str(e)
+                }
+
+        response_text = "".join(response_parts)
 
         # Parse reflection results
         try:
             # Extract JSON from response (may be wrapped in markdown)
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-
-            if json_start >= 0 and json_end > json_start:
-                json_str = response_text[json_start:json_end]
-                result = json.loads(json_str)
+            result = _find_json_object(response_text)
 
+            if result is not None:
                 # Structure the result
                 return {
                     "observations": result.get("new_key_points", []),
@@ -222,8 +368,8 @@ class Reflector:
             "total_evaluated": len(evaluations)
         }
 
-        for eval_item in evaluations:
-            rating = eval_item.get("rating", "neutral")
-            summary[rating] = summary.get(rating, 0) + 1
+        summary.update(Counter(
+            eval_item.get("rating", "neutral") for eval_item in evaluations
+        ))
 
         return summary
@@ -4,11 +4,22 @@ Claude ACE - Diagnostic Analyzer
 Analyze diagnostic logs to understand learning patterns and system behavior
 """
 import json
+import mmap
+import os
+import re
 import sys
 from pathlib import Path
 from datetime import datetime
 from collections import Counter, defaultdict
 
+# ```json fenced block, and an untagged ``` block as the fallback when the
+# response has no ```json fence (fences of other languages are skipped)
+_JSON_FENCE_RE = re.compile(rb"```json(.*?)```", re.DOTALL)
+_BARE_FENCE_RE = re.compile(rb"```[ \t]*\n(.*?)```", re.DOTALL)
+
+# Parsed file info from earlier runs, keyed by file name
+CACHE_FILENAME = ".analysis_cache.json"
+
 
 def get_diagnostic_dir():
     """Get path to diagnostic directory"""
@@ -28,41 +39,83 @@ def get_diagnostic_dir():
     return None
 
 
+def get_hook_type(f: Path) -> str:
+    """Extract hook type from a diagnostic file name"""
+    parts = f.stem.split('_')[2:]
+    # Skip the sequence number (older files don't have one)
+    if parts and len(parts[0]) == 4 and parts[0].isdigit():
+        parts = parts[1:]
+    return '_'.join(parts)
+
+
 def parse_diagnostic_file(filepath):
     """Extract information from a diagnostic file"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+    with open(filepath, 'rb') as f:
+        # Empty files can't be mapped
+        if os.fstat(f.fileno()).st_size == 0:
+            return _parse_diagnostic_content(filepath, b'')
+
+        # Memory-mapped: markers are searched in place, without reading and
+        # decoding the whole file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            return _parse_diagnostic_content(filepath, content)
 
+
+def _parse_diagnostic_content(filepath, content):
+    """Extract information from diagnostic file bytes (or a mapping of them)"""
     info = {
         'filepath': filepath,
         'size': len(content),
-        'has_prompt': '# PROMPT' in content,
-        'has_response': '# RESPONSE' in content,
-        'has_error': 'ERROR' in content or 'Error' in content,
+        'has_prompt': content.find(b'# PROMPT') != -1,
+        'has_response': content.find(b'# RESPONSE') != -1,
+        'has_error': content.find(b'ERROR') != -1 or content.find(b'Error') != -1,
     }
 
     # Try to extract new key points count
-    if '"new_key_points"' in content:
+    if content.find(b'"new_key_points"') != -1:
         try:
             # Find the JSON response section
-            response_start = content.find('# RESPONSE')
+            response_start = content.find(b'# RESPONSE')
             if response_start != -1:
-                json_text = content[response_start:]
-                # Try to parse JSON
-                if '```json' in json_text:
-                    start = json_text.find('```json') + 7
-                    end = json_text.find('```', start)
-                    if end != -1:
-                        json_str = json_text[start:end].strip()
-                        data = json.loads(json_str)
-                        info['new_key_points_count'] = len(data.get('new_key_points', []))
-                        info['evaluations_count'] = len(data.get('evaluations', []))
+                # Try to parse JSON from the first ```json block, else the
+                # first untagged block (only that slice is copied out of the file)
+                match = (_JSON_FENCE_RE.search(content, response_start)
+                         or _BARE_FENCE_RE.search(content, response_start))
+                if match:
+                    data = json.loads(match.group(1).strip())
+                    info['new_key_points_count'] = len(data.get('new_key_points', []))
+                    info['evaluations_count'] = len(data.get('evaluations', []))
         except:
             pass
 
     return info
 
 
+def load_analysis_cache(cache_path: Path) -> dict:
+    """Load cached file info: {name: [mtime_ns, size, info]}"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_analysis_cache(cache_path: Path, cache: dict):
+    """Save cached file info (temp file + rename, never a torn cache)"""
+    tmp_path = cache_path.with_name(f"{cache_path.name}.tmp.{os.getpid()}")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️  Could not save analysis cache: {e}")
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
 def analyze_diagnostics():
     """Analyze all diagnostic files and show statistics"""
     diag_dir = get_diagnostic_dir()
@@ -102,12 +155,18 @@ def analyze_diagnostics():
 
     print("\n📊 Analyzing files...")
 
+    # Only files that are new or changed since the last run are parsed
+    cache_path = diag_dir / CACHE_FILENAME
+    cache = load_analysis_cache(cache_path)
+    new_cache = {}
+
     for f in files:
-        # Parse filename: YYYYMMDD_HHMMSS_type.txt
+        # Parse filename: YYYYMMDD_HHMMSS_[SEQ_]type.txt
         parts = f.stem.split('_')
+        date_str = ""
         if len(parts) >= 3:
             date_str = parts[0]
-            hook_type = '_'.join(parts[2:])
+            hook_type = get_hook_type(f)
         else:
             hook_type = f.stem
 
@@ -117,8 +176,16 @@ def analyze_diagnostics():
         if len(date_str) == 8:
             dates[date_str] += 1
 
-        # Parse file content
-        info = parse_diagnostic_file(f)
+        # Parse file content (or reuse the cached result)
+        stat = f.stat()
+        cached = cache.get(f.name)
+        if (isinstance(cached, list) and len(cached) == 3
+                and cached[:2] == [stat.st_mtime_ns, stat.st_size]):
+            info = cached[2]
+        else:
+            info = parse_diagnostic_file(f)
+            info.pop('filepath', None)
+        new_cache[f.name] = [stat.st_mtime_ns, stat.st_size, info]
 
         if info.get('has_error'):
             errors.append(f.name)
@@ -132,6 +199,10 @@ def analyze_diagnostics():
         if 'evaluations_count' in info:
             learning_stats['total_evaluations'] += info['evaluations_count']
 
+    # Entries of deleted files are dropped
+    if new_cache != cache:
+        save_analysis_cache(cache_path, new_cache)
+
     # Display results
     print("\n📋 By Hook Type:")
     for hook_type, count in types.most_common():
@@ -171,7 +242,7 @@ def analyze_diagnostics():
         except:
             formatted = timestamp_str
 
-        hook_type = '_'.join(f.stem.split('_')[2:])
+        hook_type = get_hook_type(f)
         size = f.stat().st_size
 
         print(f"   {formatted}  {hook_type:<25}  {size:>6} bytes")
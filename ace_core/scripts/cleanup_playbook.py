@@ -4,11 +4,31 @@ Claude ACE - Playbook Cleanup Tool
 Remove duplicates and low-scoring entries from the playbook
 """
 import json
+import os
 import sys
 from pathlib import Path
 from datetime import datetime
 from difflib import SequenceMatcher
 
+# Shared helpers live with the hooks (.claude/hooks, ace_core/hooks in the repo)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "hooks"))
+from common import char_ngram_minhash
+
+# Optional MinHash LSH: duplicate candidates without comparing every pair
+try:
+    from datasketch import MinHashLSH
+    DATASKETCH_AVAILABLE = True
+except ImportError:
+    DATASKETCH_AVAILABLE = False
+
+# Margin between the similarity threshold and the estimated Jaccard
+# similarity (character 3-grams) at which a kept entry becomes a duplicate
+# candidate: texts that are 85% similar can share less than half of their
+# 3-grams. Candidates are confirmed with SequenceMatcher.
+LSH_THRESHOLD_MARGIN = 0.55
+LSH_MIN_THRESHOLD = 0.1
+LSH_NUM_PERM = 128
+
 
 def get_playbook_path():
     """Get path to playbook.json"""
@@ -35,6 +55,60 @@ def similarity(text1, text2):
     return SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
 
 
+def _is_similar(text, matcher, threshold):
+    """
+    similarity(text, seen) >= threshold, for lowercased texts, where matcher
+    is a SequenceMatcher with seen as its second sequence (difflib caches the
+    analysis of the second sequence, so it is built once per kept text).
+    """
+    matcher.set_seq1(text)
+    # Cheap upper bounds on ratio() first: lengths, then character counts
+    return (matcher.real_quick_ratio() >= threshold
+            and matcher.quick_ratio() >= threshold
+            and matcher.ratio() >= threshold)
+
+
+def remove_duplicates(key_points, similarity_threshold):
+    """
+    Split key points into unique ones and duplicates of an earlier kept one.
+
+    With datasketch, each text is only compared against the LSH candidates
+    among the kept texts; otherwise against all of them.
+
+    Returns:
+        (unique_points, removed_points)
+    """
+    unique_points = []
+    removed_dup = []
+
+    lsh = None
+    if DATASKETCH_AVAILABLE:
+        lsh_threshold = max(similarity_threshold - LSH_THRESHOLD_MARGIN, LSH_MIN_THRESHOLD)
+        lsh = MinHashLSH(threshold=lsh_threshold, num_perm=LSH_NUM_PERM)
+    # One matcher per kept (lowercased) text, reused for every comparison
+    seen_matchers = []
+
+    for kp in key_points:
+        text = kp['text'].lower()
+
+        if lsh is not None:
+            minhash = char_ngram_minhash(text, LSH_NUM_PERM)
+            candidates = sorted(lsh.query(minhash))
+        else:
+            candidates = range(len(seen_matchers))
+
+        if any(_is_similar(text, seen_matchers[i], similarity_threshold) for i in candidates):
+            removed_dup.append(kp)
+            continue
+
+        if lsh is not None:
+            lsh.insert(len(seen_matchers), minhash)
+        unique_points.append(kp)
+        seen_matchers.append(SequenceMatcher(None, '', text))
+
+    return unique_points, removed_dup
+
+
 def cleanup_playbook(dry_run=True, threshold=-5, similarity_threshold=0.85):
     """
     Clean up playbook by removing:
@@ -93,23 +167,7 @@ def cleanup_playbook(dry_run=True, threshold=-5, similarity_threshold=0.85):
         print("   ✓ No low-scoring entries found")
 
     # Step 2: Remove duplicates
-    removed_dup = []
-    unique_points = []
-    seen_texts = []
-
-    for kp in kept_points:
-        text = kp['text']
-        is_duplicate = False
-
-        for seen_text in seen_texts:
-            if similarity(text, seen_text) >= similarity_threshold:
-                is_duplicate = True
-                removed_dup.append(kp)
-                break
-
-        if not is_duplicate:
-            unique_points.append(kp)
-            seen_texts.append(text)
+    unique_points, removed_dup = remove_duplicates(kept_points, similarity_threshold)
 
     print(f"\n🔄 Duplicate Removal (≥{similarity_threshold:.0%} similar):")
     if removed_dup:
@@ -138,16 +196,18 @@ def cleanup_playbook(dry_run=True, threshold=-5, similarity_threshold=0.85):
     else:
         # Save cleaned playbook
         data['key_points'] = unique_points
-        data['last_updated'] = datetime.now().isoformat()
+        data['last_updated'] = datetime.now().isoformat(timespec='seconds')
 
         # Backup original
         backup_path = playbook_path.parent / f"playbook.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         with open(backup_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
 
-        # Save cleaned version
-        with open(playbook_path, 'w', encoding='utf-8') as f:
+        # Save cleaned version (temp file + rename, so hooks never read a torn file)
+        tmp_path = playbook_path.with_name(f"{playbook_path.name}.tmp.{os.getpid()}")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, playbook_path)
 
         print(f"\n✅ Changes saved!")
         print(f"   Backup: {backup_path}")
@@ -23,8 +23,9 @@ def get_playbook_path():
         return current.parent / ".claude" / "playbook.json"
 
     # Try explicit path argument
-    if len(sys.argv) > 1:
-        explicit_path = Path(sys.argv[1])
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if args:
+        explicit_path = Path(args[0])
         if explicit_path.exists():
             return explicit_path
 
@@ -49,13 +50,18 @@ def view_playbook():
     if not playbook_path:
         print("❌ No playbook found!")
         print("\nUsage:")
-        print("  python view_playbook.py [path/to/playbook.json]")
+        print("  python view_playbook.py [--pretty] [path/to/playbook.json]")
         print("\nOr run from project directory containing .claude/playbook.json")
         sys.exit(1)
 
     with open(playbook_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
 
+    # playbook.json is stored compact; --pretty dumps it indented
+    if "--pretty" in sys.argv[1:]:
+        print(json.dumps(data, indent=2, ensure_ascii=False))
+        return
+
     # Header
     print("═" * 80)
     print("📚 CLAUDE ACE PLAYBOOK VIEWER")
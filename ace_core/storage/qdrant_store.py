@@ -13,7 +13,8 @@ try:
     from qdrant_client import QdrantClient, AsyncQdrantClient
     from qdrant_client.models import (
         Distance, VectorParams, PointStruct,
-        Filter, FieldCondition, Range
+        Filter, FieldCondition, Range,
+        SetPayload, SetPayloadOperation
     )
     QDRANT_AVAILABLE = True
 except ImportError:
@@ -230,6 +231,38 @@ class QdrantVectorStore:
             self.stats['total_errors'] += 1
             raise
 
+    async def update_scores(self, scores: Dict[str, int]) -> int:
+        """
+        Update the Playbook score payload of indexed strategies (vectors are kept)
+
+        Args:
+            scores: Strategy name -> new score
+
+        Returns:
+            Number of updated strategies
+        """
+        if not scores:
+            return 0
+
+        try:
+            # One batch request, one payload update per point
+            await self.client.batch_update_points(
+                collection_name=self.collection_name,
+                update_operations=[
+                    SetPayloadOperation(set_payload=SetPayload(
+                        payload={'score': score},
+                        points=[str(uuid.uuid5(uuid.NAMESPACE_DNS, name))]
+                    ))
+                    for name, score in scores.items()
+                ]
+            )
+            return len(scores)
+
+        except Exception as e:
+            print(f"✗ Failed to update scores: {e}")
+            self.stats['total_errors'] += 1
+            raise
+
     async def search(
         self,
         query_embedding: List[float],
@@ -96,7 +96,9 @@ class PlaybookVectorStore:
                 'port': 6333,
                 'collection': 'playbook_strategies'
             },
-            'min_strategies_for_index': 10
+            'min_strategies_for_index': 10,
+            'index_batch_size': 32,
+            'index_concurrency': 2
         }
 
     def _auto_select_backend(self):
@@ -231,25 +233,90 @@ class PlaybookVectorStore:
 
         return 0
 
+    def index_strategies(
+        self,
+        strategies: List[Dict],
+        removed_names: Optional[List[str]] = None,
+        rescored: Optional[List[Dict]] = None
+    ) -> int:
+        """
+        Incrementally update the index (the existing index is kept)
+
+        Args:
+            strategies: New strategies, or strategies whose text changed, to
+                embed and upsert
+            removed_names: Names of strategies to drop from the index
+            rescored: Indexed strategies whose score changed (text unchanged);
+                only their stored score is updated, without re-embedding
+
+        Returns:
+            Number of strategies indexed
+
+        Raises:
+            Exception: If the backend update fails (the index may then be
+                partially updated)
+        """
+        if not self.backend:
+            return 0
+
+        count = 0
+        if self.backend['type'] == 'qdrant':
+            if strategies:
+                count = self._index_qdrant(strategies)
+                if count != len(strategies):
+                    raise RuntimeError(f"Qdrant indexed {count} of {len(strategies)} strategies")
+            if rescored:
+                _run_async_safe(self.backend['store'].update_scores(
+                    {s['name']: s.get('score', 0) for s in rescored}
+                ))
+            if removed_names:
+                _run_async_safe(self.backend['store'].delete_strategies(removed_names))
+        elif self.backend['type'] == 'chroma':
+            collection = self.backend['collection']
+            if strategies:
+                ids, texts, metadatas = self._chroma_records(strategies)
+                collection.upsert(ids=ids, documents=texts, metadatas=metadatas)
+                count = len(strategies)
+            if rescored:
+                # Metadata-only update: documents (and embeddings) are kept
+                ids, _, metadatas = self._chroma_records(rescored)
+                collection.update(ids=ids, metadatas=metadatas)
+            if removed_names:
+                collection.delete(ids=list(removed_names))
+
+        return count
+
     def _index_qdrant(self, strategies: List[Dict]) -> int:
         """Index strategies using Qdrant"""
+        batch_size = max(1, self.config.get('index_batch_size', 32))
+        batches = [strategies[i:i + batch_size]
+                   for i in range(0, len(strategies), batch_size)]
+
         async def _do_index():
-            # Generate embeddings
-            texts = [s['text'] for s in strategies]
+            store = self.backend['store']
 
-            async with self.backend['embedding'] as embed_client:
-                results = await embed_client.embed_batch(texts)
+            # Create the collection up front, so concurrent batches don't race
+            await store.ensure_collection()
 
-            if len(results) != len(strategies):
-                raise Exception(f"Embedding count mismatch: {len(results)} vs {len(strategies)}")
+            # Embed and upsert batches concurrently, bounded by index_concurrency
+            semaphore = asyncio.Semaphore(max(1, self.config.get('index_concurrency', 2)))
 
-            # Extract embeddings
-            embeddings = [r.embedding for r in results]
+            async def _index_batch(embed_client, batch):
+                async with semaphore:
+                    results = await embed_client.embed_batch([s['text'] for s in batch])
 
-            # Index in Qdrant
-            count = await self.backend['store'].index_strategies(strategies, embeddings)
+                    if len(results) != len(batch):
+                        raise Exception(f"Embedding count mismatch: {len(results)} vs {len(batch)}")
 
-            return count
+                    embeddings = [r.embedding for r in results]
+                    return await store.index_strategies(batch, embeddings)
+
+            async with self.backend['embedding'] as embed_client:
+                counts = await asyncio.gather(
+                    *(_index_batch(embed_client, batch) for batch in batches)
+                )
+
+            return sum(counts)
 
         try:
             return _run_async_safe(_do_index())
@@ -273,13 +340,7 @@ class PlaybookVectorStore:
                 print(f"Warning: Could not recreate collection, using existing: {e}", file=sys.stderr)
 
             # Add strategies
-            ids = [s['name'] for s in strategies]
-            texts = [s['text'] for s in strategies]
-            metadatas = [{
-                'score': s.get('score', 0),
-                'status': s.get('status', 'active'),
-                'source': s.get('source', 'unknown')
-            } for s in strategies]
+            ids, texts, metadatas = self._chroma_records(strategies)
 
             collection.add(
                 ids=ids,
@@ -293,6 +354,18 @@ class PlaybookVectorStore:
             print(f"ChromaDB indexing failed: {e}", file=sys.stderr)
             return 0
 
+    @staticmethod
+    def _chroma_records(strategies: List[Dict]):
+        """Build ChromaDB ids, documents and metadatas for strategies"""
+        ids = [s['name'] for s in strategies]
+        texts = [s['text'] for s in strategies]
+        metadatas = [{
+            'score': s.get('score', 0),
+            'status': s.get('status', 'active'),
+            'source': s.get('source', 'unknown')
+        } for s in strategies]
+        return ids, texts, metadatas
+
     def search(
         self,
         query: str,
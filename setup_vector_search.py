@@ -207,6 +207,8 @@ def create_config(
                 'collection': collection
             },
             'min_strategies_for_index': 10,
+            'index_batch_size': 32,
+            'index_concurrency': 2,
             'search': {
                 'default_limit': 10,
                 'similarity_threshold': 0.7
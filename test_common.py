@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Tests for shared hook helpers in common.py
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add hooks to path
+sys.path.insert(0, str(Path(__file__).parent / "ace_core" / "hooks"))
+
+import common
+
+
+class ProjectDirTestCase(unittest.TestCase):
+    """Points CLAUDE_PROJECT_DIR at a temporary project for each test"""
+
+    def setUp(self):
+        self.project_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.project_dir)
+
+        previous = os.environ.get("CLAUDE_PROJECT_DIR")
+        os.environ["CLAUDE_PROJECT_DIR"] = str(self.project_dir)
+        self.addCleanup(self._restore_env, previous)
+        self._clear_caches()
+
+    def _restore_env(self, previous):
+        if previous is None:
+            os.environ.pop("CLAUDE_PROJECT_DIR", None)
+        else:
+            os.environ["CLAUDE_PROJECT_DIR"] = previous
+        self._clear_caches()
+
+    @staticmethod
+    def _clear_caches():
+        common.get_project_dir.cache_clear()
+        common.get_ace_dir.cache_clear()
+        common.get_playbook_path.cache_clear()
+        common._ensure_dir.cache_clear()
+
+
+class SavePlaybookTest(ProjectDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.playbook_path = Path(common.get_playbook_path())
+        self.playbook = {
+            "version": "1.0",
+            "last_updated": None,
+            "key_points": [{"name": "kpt_001", "text": "Run ruff check", "score": 0}],
+            "_name_index": {},
+        }
+
+    def save_and_stat(self):
+        """Save, then return the playbook file's inode (a rewrite replaces it)"""
+        common.save_playbook(self.playbook)
+        return self.playbook_path.stat().st_ino
+
+    def test_helper_fields_not_saved(self):
+        common.save_playbook(self.playbook)
+        saved = json.loads(self.playbook_path.read_bytes())
+        self.assertNotIn("_name_index", saved)
+        self.assertEqual(saved["key_points"], self.playbook["key_points"])
+
+    def test_unchanged_playbook_is_not_rewritten(self):
+        first = self.save_and_stat()
+        last_updated = self.playbook["last_updated"]
+        self.assertIsNotNone(last_updated)
+
+        self.assertEqual(self.save_and_stat(), first)
+        self.assertEqual(self.playbook["last_updated"], last_updated)
+
+    def test_touched_file_is_rewritten(self):
+        first = self.save_and_stat()
+        # The mtime recorded in .playbook.sha no longer matches
+        mtime = self.playbook_path.stat().st_mtime_ns - 10**9
+        os.utime(self.playbook_path, ns=(mtime, mtime))
+        self.assertNotEqual(self.save_and_stat(), first)
+
+    def test_changed_playbook_is_rewritten(self):
+        common.save_playbook(self.playbook)
+        self.playbook["key_points"][0]["score"] = 2
+        common.save_playbook(self.playbook)
+        saved = json.loads(self.playbook_path.read_bytes())
+        self.assertEqual(saved["key_points"][0]["score"], 2)
+
+    def test_external_edit_is_overwritten(self):
+        common.save_playbook(self.playbook)
+        self.playbook_path.write_text('{"key_points": []}')
+        common.save_playbook(self.playbook)
+        saved = json.loads(self.playbook_path.read_bytes())
+        self.assertEqual(saved["key_points"], self.playbook["key_points"])
+
+
+def transcript_line(entry_type, content, role=None, **extra) -> str:
+    """One transcript JSONL line in the compact format Claude Code writes"""
+    entry = {"type": entry_type, "message": {"role": role or entry_type, "content": content}}
+    entry.update(extra)
+    return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+
+class IterTranscriptTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def messages(self, *lines):
+        path = self.tmp_dir / "transcript.jsonl"
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return list(common.iter_transcript(str(path)))
+
+    def test_skips_other_entry_types_and_bad_lines(self):
+        messages = self.messages(
+            json.dumps({"type": "summary", "summary": "no messages here"}),
+            json.dumps({"type": "system", "content": "mentions \"user\" in text"}),
+            "not json",
+            transcript_line("user", "Run the tests"),
+            # Spaced JSON still passes the raw-byte prefilter
+            json.dumps({"type": "assistant", "message": {"role": "assistant", "content": "Done"}}),
+        )
+        self.assertEqual(messages, [
+            {"role": "user", "content": "Run the tests"},
+            {"role": "assistant", "content": "Done"},
+        ])
+
+    def test_skips_meta_entries_and_joins_text_blocks(self):
+        messages = self.messages(
+            transcript_line("user", "Caveat: meta", isMeta=True),
+            transcript_line("assistant", [
+                {"type": "text", "text": "First"},
+                {"type": "tool_use", "name": "Bash"},
+                {"type": "text", "text": "Second"},
+            ]),
+        )
+        self.assertEqual(messages, [{"role": "assistant", "content": "First\nSecond"}])
+
+    def test_drops_command_output_only_in_string_content(self):
+        messages = self.messages(
+            transcript_line("user", "<command-name>/clear</command-name>"),
+            transcript_line("user", "<local-command-stdout>ok</local-command-stdout>"),
+            # Block content mentioning a marker is kept
+            transcript_line("assistant", [{"type": "text", "text": "Output of <command-name> tags"}]),
+            transcript_line("user", "What does <local-command is for?"),
+        )
+        self.assertEqual(messages, [
+            {"role": "assistant", "content": "Output of <command-name> tags"},
+            {"role": "user", "content": "What does <local-command is for?"},
+        ])
+
+    def test_non_ascii_content(self):
+        messages = self.messages(transcript_line("user", "这个建议很有用"))
+        self.assertEqual(messages, [{"role": "user", "content": "这个建议很有用"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for key point duplicate detection
+Covers the shared normalizer, the Curator's duplicate rejection and the
+cleanup script's LSH candidate search (MinHash checks need datasketch)
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Add hooks, roles and scripts to path (installed flat next to each other)
+for subdir in ("hooks", "roles", "scripts"):
+    sys.path.insert(0, str(Path(__file__).parent / "ace_core" / subdir))
+
+import cleanup_playbook
+from common import normalize_keypoint_text
+from curator import DATASKETCH_AVAILABLE, Curator
+
+
+EXISTING_TEXT = "Run ruff check before committing python files"
+
+
+def curate(*texts):
+    """Curate observations against a playbook holding EXISTING_TEXT"""
+    playbook = {"key_points": [{"name": "kpt_001", "text": EXISTING_TEXT, "status": "active"}]}
+    observations = [{"text": text, "atomicity_score": 0.9} for text in texts]
+    return Curator({}).curate({"observations": observations}, playbook)
+
+
+class NormalizerTest(unittest.TestCase):
+    def test_folds_whitespace_and_case(self):
+        self.assertEqual(normalize_keypoint_text("  Run  ruff\tcheck \n"), "run ruff check")
+        self.assertEqual(normalize_keypoint_text("Straße  X"), normalize_keypoint_text("STRASSE x"))
+
+
+class CuratorDuplicateTest(unittest.TestCase):
+    def test_rejects_whitespace_and_case_variant(self):
+        result = curate("run  RUFF check before committing   python files ")
+        self.assertEqual(result["new_key_points"], [])
+        self.assertEqual(result["rejected"][0]["reason"], "duplicate")
+
+    def test_accepts_unrelated_key_point(self):
+        result = curate("Use pytest -x when debugging failing tests")
+        self.assertEqual(len(result["new_key_points"]), 1)
+
+    @unittest.skipUnless(DATASKETCH_AVAILABLE, "datasketch not installed")
+    def test_rejects_near_duplicate(self):
+        result = curate("Run ruff check before committing python files.")
+        self.assertEqual(result["new_key_points"], [])
+        self.assertEqual(result["rejected"][0]["reason"], "duplicate")
+
+
+class CleanupDuplicateTest(unittest.TestCase):
+    KEY_POINTS = [
+        {"name": "kpt_001", "text": EXISTING_TEXT},
+        {"name": "kpt_002", "text": "run  RUFF check before committing python file"},
+        {"name": "kpt_003", "text": "Use pytest -x when debugging failing tests"},
+        {"name": "kpt_004", "text": "Use pytest -x when debugging a failing test"},
+        {"name": "kpt_005", "text": "Check the hook log when a hook fails"},
+    ]
+
+    def _kept_names(self, similarity_threshold):
+        unique, _ = cleanup_playbook.remove_duplicates(self.KEY_POINTS, similarity_threshold)
+        return [kp["name"] for kp in unique]
+
+    def test_removes_variants(self):
+        self.assertEqual(self._kept_names(0.85), ["kpt_001", "kpt_003", "kpt_005"])
+
+    @unittest.skipUnless(DATASKETCH_AVAILABLE, "datasketch not installed")
+    def test_lsh_matches_exact_scan(self):
+        for threshold in (0.85, 0.6):
+            with_lsh = self._kept_names(threshold)
+            cleanup_playbook.DATASKETCH_AVAILABLE = False
+            try:
+                exact = self._kept_names(threshold)
+            finally:
+                cleanup_playbook.DATASKETCH_AVAILABLE = True
+            self.assertEqual(with_lsh, exact)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the Feedback Environment
+Covers explicit feedback markers in user messages and the feedback log
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add hooks and roles to path (installed flat next to each other)
+for subdir in ("hooks", "roles"):
+    sys.path.insert(0, str(Path(__file__).parent / "ace_core" / subdir))
+
+from feedback_environment import FeedbackEnvironment, SimpleFeedbackCollector
+
+
+class FeedbackTestCase(unittest.TestCase):
+    def setUp(self):
+        self.ace_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.ace_dir)
+        self.environment = FeedbackEnvironment(self.ace_dir)
+
+    def rating(self, text):
+        feedback = self.environment.parse_user_feedback(text)
+        return feedback and feedback["rating"]
+
+
+class ParseUserFeedbackTest(FeedbackTestCase):
+    def test_positive_markers(self):
+        for text in ("Good advice ✓", "that was HELPFUL", "这个建议很有用", "👍"):
+            with self.subTest(text=text):
+                self.assertEqual(self.rating(text), "helpful")
+
+    def test_negative_markers(self):
+        for text in ("这个不对 ✗", "That's WRONG", "it doesn't work", "👎"):
+            with self.subTest(text=text):
+                self.assertEqual(self.rating(text), "harmful")
+
+    def test_positive_takes_precedence(self):
+        # The negative marker comes first in the text, but positive wins
+        self.assertEqual(self.rating("wrong at first, now it works well"), "helpful")
+
+    def test_no_markers(self):
+        self.assertIsNone(self.environment.parse_user_feedback("Please run the tests"))
+
+    def test_result_fields(self):
+        self.assertEqual(self.environment.parse_user_feedback("Correct!"), {
+            "rating": "helpful",
+            "source": "user_explicit",
+            "original_text": "Correct!",
+        })
+
+
+class FeedbackLogTest(FeedbackTestCase):
+    def test_collected_feedback_is_recorded_per_session(self):
+        collector = SimpleFeedbackCollector(self.environment)
+        collector.process_message("s1", {"role": "user", "content": "helpful, thanks"})
+        collector.process_message("s1", {"role": "assistant", "content": "wrong"})
+        collector.process_message("s2", {"role": "user", "content": "that is wrong"})
+
+        s1 = self.environment.get_session_feedback("s1")
+        self.assertEqual([e["data"]["rating"] for e in s1], ["helpful"])
+
+        summary = self.environment.get_feedback_summary()
+        self.assertEqual(summary["total_feedback"], 2)
+        self.assertEqual((summary["positive_count"], summary["negative_count"]), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
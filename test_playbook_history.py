@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for Playbook history
+Covers the running stats sidecar (including appends from another process
+during a flush) and the tail read behind get_recent_deltas
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add hooks to path
+sys.path.insert(0, str(Path(__file__).parent / "ace_core" / "hooks"))
+
+from delta_manager import PlaybookDelta, PlaybookHistory, _dumps_line, _loads
+
+
+PLAYBOOK = {"key_points": [{"name": "kpt_001", "text": "Run ruff check", "score": 1}]}
+
+
+def make_delta(source: str, index: int = 0, padding: int = 0) -> PlaybookDelta:
+    """Delta with one addition and one score update"""
+    delta = PlaybookDelta(source=source)
+    delta.add_keypoint({"name": f"kpt_{index:03d}", "text": "x" * padding or "Run ruff check"})
+    delta.update_score("kpt_001", 1, "helpful")
+    return delta
+
+
+class HistoryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.ace_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.ace_dir)
+
+    def open_history(self) -> PlaybookHistory:
+        history = PlaybookHistory(self.ace_dir)
+        self.addCleanup(history.close)
+        return history
+
+    def read_entries(self):
+        with open(self.ace_dir / "playbook_history.jsonl", "rb") as f:
+            return [_loads(line) for line in f if line.strip()]
+
+
+class StatsSidecarTest(HistoryTestCase):
+    def test_running_stats_match_full_scan(self):
+        history = self.open_history()
+        for i in range(PlaybookHistory.FLUSH_THRESHOLD + 3):
+            history.record_delta(make_delta("session_end" if i % 2 else "precompact", i), PLAYBOOK)
+
+        stats = history.get_stats()
+        self.assertEqual(stats, history._scan_stats())
+        self.assertEqual(stats["total_updates"], PlaybookHistory.FLUSH_THRESHOLD + 3)
+        self.assertEqual(stats["total_additions"], PlaybookHistory.FLUSH_THRESHOLD + 3)
+        self.assertTrue(history.stats_file.exists())
+
+        # A fresh instance reads the same totals back from the sidecar
+        self.assertEqual(self.open_history().get_stats(), stats)
+
+    def test_concurrent_append_during_flush_invalidates_sidecar(self):
+        history = self.open_history()
+        history.record_delta(make_delta("precompact"), PLAYBOOK)
+        history.flush()
+
+        # Another process appends right after this flush loaded the totals
+        load = PlaybookHistory._load_stats_and_size
+        foreign_entry = _dumps_line(make_delta("other_process").to_dict())
+
+        def load_then_append(self):
+            result = load(self)
+            with open(self.history_file, "ab") as f:
+                f.write(foreign_entry)
+            return result
+
+        PlaybookHistory._load_stats_and_size = load_then_append
+        try:
+            history.record_delta(make_delta("session_end"), PLAYBOOK)
+            history.flush()
+        finally:
+            PlaybookHistory._load_stats_and_size = load
+
+        self.assertFalse(history.stats_file.exists())
+        stats = history.get_stats()
+        self.assertEqual(stats["total_updates"], 3)
+        self.assertEqual(stats["updates_by_source"]["other_process"], 1)
+
+    def test_stale_sidecar_is_rebuilt(self):
+        history = self.open_history()
+        history.record_delta(make_delta("precompact"), PLAYBOOK)
+        history.close()
+
+        # Written without going through PlaybookHistory
+        with open(self.ace_dir / "playbook_history.jsonl", "ab") as f:
+            f.write(_dumps_line(make_delta("manual").to_dict()))
+
+        self.assertEqual(self.open_history().get_stats()["total_updates"], 2)
+
+
+class RecentDeltasTest(HistoryTestCase):
+    def test_tail_read_across_chunks(self):
+        history = self.open_history()
+        # ~10 KB per entry, so the last entries span several 64 KB chunks
+        for i in range(30):
+            history.record_delta(make_delta("precompact", i, padding=10000), PLAYBOOK)
+        history.flush()
+
+        entries = self.read_entries()
+        for limit in (1, 7, 30, 50):
+            with self.subTest(limit=limit):
+                self.assertEqual(history.get_recent_deltas(limit), entries[-limit:])
+
+    def test_includes_pending_entries(self):
+        history = self.open_history()
+        history.record_delta(make_delta("precompact", 1), PLAYBOOK)
+        history.record_delta(make_delta("session_end", 2), PLAYBOOK)
+
+        recent = history.get_recent_deltas(1)
+        self.assertEqual([d["source"] for d in recent], ["session_end"])
+
+    def test_missing_history(self):
+        self.assertEqual(self.open_history().get_recent_deltas(5), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
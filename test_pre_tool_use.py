@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the PreToolUse safety checks
+The combined-pattern prefilter must give the same verdicts as trying each
+dangerous pattern in list order
+"""
+
+import re
+import sys
+import unittest
+from pathlib import Path
+
+# Add hooks to path
+sys.path.insert(0, str(Path(__file__).parent / "ace_core" / "hooks"))
+
+from pre_tool_use import DANGEROUS_PATTERNS, check_bash_safety, check_tool_safety
+
+
+COMMANDS = [
+    "ls -la",
+    "git status",
+    "pytest -x tests/",
+    "rm -rf /",
+    "rm -rf ~/projects",
+    "rm -rf *",
+    "rm -rf . ",
+    "sudo rm /etc/hosts",
+    "chmod 777 script.sh",
+    "git push origin --force main",
+    "git reset --hard HEAD~7",
+    "cat .env",
+    "echo $API_TOKEN",
+    "echo token; rm -rf /",
+    "cat config.pem && sudo rm -f x",
+    "pip install git+http://example.com/pkg.git",
+    "eval $CMD",
+    "rm build/output.o",
+]
+
+
+def first_matching_pattern(command):
+    """Reference verdict: first dangerous pattern in list order, or None"""
+    for pattern_def in DANGEROUS_PATTERNS:
+        if re.search(pattern_def['pattern'], command, re.IGNORECASE):
+            return pattern_def
+    return None
+
+
+class BashSafetyTest(unittest.TestCase):
+    def test_verdicts_follow_pattern_order(self):
+        for command in COMMANDS:
+            with self.subTest(command=command):
+                expected = first_matching_pattern(command)
+                result = check_bash_safety(command)
+                if expected is None:
+                    self.assertNotIn('pattern', result)
+                else:
+                    self.assertEqual(result['pattern'], expected['pattern'])
+                    self.assertEqual(result['safe'], not expected['block'])
+
+    def test_later_dangerous_command_is_blocked(self):
+        # The leftmost match (echo ... token) is only a warning
+        result = check_bash_safety("echo token; rm -rf /")
+        self.assertFalse(result['safe'])
+        self.assertEqual(result['severity'], 'critical')
+
+    def test_safe_commands(self):
+        for command in ("", "ls -la", "git status", "pytest -x tests/"):
+            with self.subTest(command=command):
+                self.assertTrue(check_bash_safety(command)['safe'])
+                self.assertEqual(check_bash_safety(command)['severity'], 'none')
+
+    def test_checks_after_patterns(self):
+        self.assertFalse(check_bash_safety("pip install git+http://example.com/pkg.git")['safe'])
+        self.assertFalse(check_bash_safety("eval $CMD")['safe'])
+
+
+class ToolSafetyTest(unittest.TestCase):
+    def test_dispatch_by_tool(self):
+        self.assertFalse(check_tool_safety({'toolName': 'Bash', 'input': {'command': 'sudo rm x'}})['safe'])
+        self.assertFalse(check_tool_safety({'toolName': 'Write', 'input': {'file_path': '/etc/hosts'}})['safe'])
+        self.assertTrue(check_tool_safety({'toolName': 'Read', 'input': {'file_path': '/etc/hosts'}})['safe'])
+        self.assertTrue(check_tool_safety({'toolName': 'Bash'})['safe'])
+
+
+if __name__ == "__main__":
+    unittest.main()